@@ -0,0 +1,107 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Measure the overhead of the test runner for every test.
+
+Runs a layer of empty tests with a testSetUp hook and some
+--ignore-new-thread patterns, while some other threads are running, and
+reports the time per test, also compared to the unittest runner::
+
+    $ python benchmarks/runner_overhead.py [tests [threads]]
+"""
+
+import io
+import sys
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+
+from zope.testrunner.runner import Runner
+
+
+class Layer:
+
+    @classmethod
+    def setUp(cls):
+        pass
+
+    @classmethod
+    def tearDown(cls):
+        pass
+
+
+class SubLayer(Layer):
+
+    @classmethod
+    def setUp(cls):
+        pass
+
+    @classmethod
+    def tearDown(cls):
+        pass
+
+    @classmethod
+    def testSetUp(cls):
+        pass
+
+
+def make_suite(n_tests):
+    def test(self):
+        pass
+
+    attrs = {'test_%06d' % i: test for i in range(n_tests)}
+    attrs['layer'] = SubLayer
+    case = type('EmptyTests', (unittest.TestCase,), attrs)
+    return unittest.defaultTestLoader.loadTestsFromTestCase(case)
+
+
+def time_zope_testrunner(n_tests):
+    runner = Runner(
+        args=['test', '--ignore-new-thread', 'ignored-.*',
+              '--ignore-new-thread', 'other-.*'],
+        found_suites=[make_suite(n_tests)])
+    with redirect_stdout(io.StringIO()):
+        t = time.perf_counter()
+        runner.run()
+        return time.perf_counter() - t
+
+
+def time_unittest(n_tests):
+    suite = make_suite(n_tests)
+    runner = unittest.TextTestRunner(stream=io.StringIO())
+    t = time.perf_counter()
+    runner.run(suite)
+    return time.perf_counter() - t
+
+
+def main(n_tests=20000, n_threads=20, repeat=5):
+    stop = threading.Event()
+    for i in range(n_threads):
+        threading.Thread(target=stop.wait, daemon=True).start()
+    try:
+        # The fastest run is the one least disturbed by other processes.
+        zope = min(time_zope_testrunner(n_tests) for i in range(repeat))
+        plain = min(time_unittest(n_tests) for i in range(repeat))
+    finally:
+        stop.set()
+    print('zope.testrunner: %.3f s, %.1f us per test'
+          % (zope, zope / n_tests * 1e6))
+    print('unittest:        %.3f s, %.1f us per test'
+          % (plain, plain / n_tests * 1e6))
+    print('overhead:        %.1f us per test'
+          % ((zope - plain) / n_tests * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:3]])
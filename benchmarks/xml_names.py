@@ -0,0 +1,93 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Measure the XML output for many doctests.
+
+Creates doctests of modules and of text files, like a large project
+using --xml has, and reports the time ``parse_test`` needs per test and
+the time to record them and write the XML reports::
+
+    $ python benchmarks/xml_names.py [tests]
+"""
+
+import doctest
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from zope.testrunner.formatter import XMLOutputFormattingWrapper
+from zope.testrunner.formatter import parse_test
+
+
+class NullFormatter:
+
+    def test_success(self, test, seconds):
+        pass
+
+    def stop_test(self, test, gccount):
+        pass
+
+
+def make_tests(n_tests):
+    src = os.path.join(os.getcwd(), 'src', 'pkg')
+    tests = []
+    for i in range(n_tests):
+        if i % 2:
+            test = doctest.DocTest(
+                [], {}, 'pkg.mod%d.func%d' % (i % 100, i),
+                os.path.join(src, 'mod%d.py' % (i % 100)), 1, '')
+            tests.append(doctest.DocTestCase(test))
+        else:
+            test = doctest.DocTest(
+                [], {}, 'file%d.rst' % (i % 50),
+                os.path.join(src, 'docs', 'file%d.rst' % (i % 50)), 0, '')
+            tests.append(doctest.DocFileCase(test))
+    return tests
+
+
+def time_parse_test(tests):
+    t = time.perf_counter()
+    for test in tests:
+        parse_test(test)
+    return time.perf_counter() - t
+
+
+def time_xml_output(tests):
+    folder = Path(tempfile.mkdtemp())
+    try:
+        output = XMLOutputFormattingWrapper(NullFormatter(), folder)
+        t = time.perf_counter()
+        output.expect_tests(tests)
+        for test in tests:
+            output.test_success(test, 0.0)
+            output.stop_test(test, 0)
+        output.writeXMLReports()
+        return time.perf_counter() - t
+    finally:
+        shutil.rmtree(folder)
+
+
+def main(n_tests=100000, repeat=5):
+    # The fastest run is the one least disturbed by other processes.
+    parse = min(time_parse_test(make_tests(n_tests)) for i in range(repeat))
+    xml = min(time_xml_output(make_tests(n_tests)) for i in range(repeat))
+    print('parse_test: %.2f us per test' % (parse / n_tests * 1e6))
+    print('XML output: %.3f s, %.1f us per test'
+          % (xml, xml / n_tests * 1e6))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]])
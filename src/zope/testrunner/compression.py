@@ -0,0 +1,221 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Compression of the reports while they are written.
+"""
+
+import io
+import sys
+import time
+import zlib
+
+import zope.testrunner.feature
+
+
+try:
+    from compression import zstd
+except ImportError:
+    zstd = None
+    try:
+        import zstandard
+    except ImportError:
+        zstandard = None
+else:
+    zstandard = None
+
+
+class _Zlib:
+    """gzip compression with zlib."""
+
+    def __init__(self):
+        # 31 means a gzip header and trailer.
+        self._compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush_block(self):
+        return self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _Zstd:
+    """zstd compression with compression.zstd (Python 3.14+)."""
+
+    def __init__(self):
+        self._compressor = zstd.ZstdCompressor()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush_block(self):
+        return self._compressor.flush(zstd.ZstdCompressor.FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush(zstd.ZstdCompressor.FLUSH_FRAME)
+
+
+class _Zstandard:
+    """zstd compression with the zstandard package."""
+
+    def __init__(self):
+        self._compressor = zstandard.ZstdCompressor().compressobj()
+
+    def compress(self, data):
+        return self._compressor.compress(data)
+
+    def flush_block(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self):
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def available_methods():
+    """Return the names of the compression methods which can be used."""
+    methods = ['gzip']
+    if zstd is not None or zstandard is not None:
+        methods.append('zstd')
+    return methods
+
+
+SUFFIXES = {
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+
+def _compressor(method):
+    if method == 'gzip':
+        return _Zlib()
+    if method == 'zstd':
+        if zstd is not None:
+            return _Zstd()
+        if zstandard is not None:
+            return _Zstandard()
+    raise ValueError('Unsupported compression method: %s' % method)
+
+
+class CompressedWriter(io.RawIOBase):
+    """Write compressed data to a binary file object.
+
+    The data is compressed as it is written, so that it reaches the file
+    while the tests are running.  flush() makes everything written so far
+    decompressable, which costs compression, so it only does that if it
+    did not in the last `flush_interval` seconds.  close() finishes the
+    compressed data but does not close the file object.  Like for gzip
+    files, tell() is the position in the uncompressed data.
+    """
+
+    def __init__(self, fileobj, method, flush_interval=0):
+        super().__init__()
+        self.fileobj = fileobj
+        self.flush_interval = flush_interval
+        self._compressor = _compressor(method)
+        self._dirty = False
+        self._last_flush = time.monotonic()
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def write(self, data):
+        if self.closed:
+            raise ValueError('write to closed file')
+        data = bytes(data)
+        if data:
+            self._dirty = True
+            self._position += len(data)
+            compressed = self._compressor.compress(data)
+            if compressed:
+                self.fileobj.write(compressed)
+        return len(data)
+
+    def flush(self):
+        if self.closed or not self._dirty:
+            return
+        now = time.monotonic()
+        if now - self._last_flush < self.flush_interval:
+            return
+        self._last_flush = now
+        self._dirty = False
+        self.fileobj.write(self._compressor.flush_block())
+        self.fileobj.flush()
+
+    def close(self):
+        if not self.closed:
+            self._dirty = False
+            self.fileobj.write(self._compressor.finish())
+            self.fileobj.flush()
+        super().close()
+
+
+class CompressSubunit(zope.testrunner.feature.Feature):
+    """Compress the subunit stream written to stdout.
+
+    Subprocesses write their subunit stream uncompressed to the parent
+    process, which copies it into its own compressed stream.
+
+    The compressed stream is finished and stdout restored when the tests
+    were run, even if that failed.  What the features write when reporting
+    is compressed separately and appended; gzip members and zstd frames
+    which follow each other decompress to the concatenation of their data.
+    """
+
+    def __init__(self, runner):
+        super().__init__(runner)
+        options = runner.options
+        self.active = bool(
+            options.compress_reports
+            and (options.subunit or options.subunit_v2)
+            and options.resume_layer is None)
+        if not self.active:
+            return
+        self.stdout = sys.stdout
+        self.writer = None
+        self.start()
+
+    def start(self):
+        options = self.runner.options
+        stdout_buffer = getattr(self.stdout, 'buffer', self.stdout)
+        self.writer = CompressedWriter(
+            stdout_buffer, options.compress_reports,
+            getattr(options, 'flush_interval', 0))
+        sys.stdout = io.TextIOWrapper(
+            self.writer, encoding='utf-8', write_through=True)
+        options.output.set_stream(sys.stdout)
+
+    def finish(self):
+        if self.writer is None:
+            return
+        sys.stdout.flush()
+        sys.stdout.detach()
+        self.writer.close()
+        self.writer = None
+        sys.stdout = self.stdout
+        self.runner.options.output.set_stream(sys.stdout)
+
+    def global_teardown(self):
+        self.finish()
+        if self.runner.show_report:
+            self.start()
+
+    def report(self):
+        # The runner adds this feature after all others which report, so
+        # that their reports are compressed as well.
+        self.finish()
@@ -0,0 +1,159 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Status of the layers run in parallel subprocesses.
+"""
+
+import time
+
+import zope.testrunner.timings
+
+
+class Dashboard:
+    """Show what the subprocesses of a parallel test run (-j) are doing.
+
+    There is a worker for every subprocess which may run at the same time.
+    On a terminal, a line for every worker with the layer it runs, the
+    number of tests it started and for how long it has been running, and a
+    line with the number of layers run and the estimated time left are
+    redrawn in place.  Otherwise a line is written when a worker starts or
+    finishes a layer.
+
+    The time left is estimated from the durations recorded with --timings,
+    so it is only shown if there are any.
+
+    The results are those of resume_tests().  The runner calls update()
+    regularly and clear() before it writes anything else to the stream.
+    """
+
+    def __init__(self, options, layers, stream, tty=None):
+        self.output = options.output
+        self.stream = stream
+        if tty is None:
+            try:
+                tty = stream.isatty()
+            except (AttributeError, ValueError):
+                tty = False
+        self.tty = tty
+        rate = getattr(options, 'progress_rate', 0)
+        self.interval = 1 / rate if rate else 0
+        repeat = options.repeat or 1
+        self.workers = [None] * options.processes
+        self.totals = {}
+        self.estimates = None
+        timings = (zope.testrunner.timings.Timings(options.timings)
+                   if options.timings else None)
+        if timings is not None and timings.tests:
+            mean = sum(timings.tests.values()) / len(timings.tests)
+            self.estimates = {}
+        for layer_name, layer, tests in layers:
+            self.totals[layer_name] = tests.countTestCases() * repeat
+            if self.estimates is not None:
+                self.estimates[layer_name] = (
+                    timings.layers.get(layer_name, 0.0)
+                    + repeat * sum(timings.tests.get(test.id(), mean)
+                                   for test in tests))
+        self.start_time = time.monotonic()
+        self._last_update = None
+        # The results which were started
+        self._seen = set()
+        # The number of lines drawn on the terminal
+        self._lines = 0
+
+    def write(self, line):
+        self.stream.write(line.encode('utf-8'))
+
+    def update(self, results, force=False):
+        """Show the state of the workers, if it is time to."""
+        now = time.monotonic()
+        finished = False
+        for index, result in enumerate(self.workers):
+            if result is not None and result.done:
+                self.finish(index, result, now)
+                finished = True
+        for result in results:
+            if result.start_time is None or result in self._seen:
+                continue
+            self._seen.add(result)
+            index = self.workers.index(None)
+            self.workers[index] = result
+            if not self.tty:
+                self.write('  [%d] Started %s: %d tests\n' % (
+                    index + 1, result.layer_name,
+                    self.totals.get(result.layer_name, 0)))
+            if result.done:
+                self.finish(index, result, now)
+                finished = True
+        if not self.tty:
+            if finished:
+                self.write(self.format_totals(results, now) + '\n')
+            return
+        if (not force and self._last_update is not None
+                and now - self._last_update < self.interval):
+            return
+        self._last_update = now
+        lines = [self.format_worker(index, result, now)
+                 for index, result in enumerate(self.workers)]
+        lines.append(self.format_totals(results, now))
+        width = self.output.max_width - 1
+        self.clear()
+        self.write(''.join(line[:width] + '\n' for line in lines))
+        self._lines = len(lines)
+
+    def finish(self, index, result, now):
+        self.workers[index] = None
+        if not self.tty:
+            self.write(self.format_worker(index, result, now) + '\n')
+
+    def clear(self):
+        """Remove the lines drawn on the terminal."""
+        if self._lines:
+            # Move to the first line and erase to the end of the screen.
+            self.write('\x1b[%dF\x1b[J' % self._lines)
+            self._lines = 0
+
+    def format_worker(self, index, result, now):
+        if result is None:
+            return '  [%d] idle' % (index + 1)
+        total = self.totals.get(result.layer_name, 0)
+        if result.done:
+            return '  [%d] Finished %s: %d/%d tests in %s' % (
+                index + 1, result.layer_name, result.num_ran, total,
+                self.output.format_seconds(now - result.start_time))
+        return '  [%d] Running %s: %d/%d tests for %s' % (
+            index + 1, result.layer_name, result.tests_started, total,
+            self.output.format_seconds(now - result.start_time))
+
+    def format_totals(self, results, now):
+        done = sum(1 for result in results if result.done)
+        s = '  %d/%d layers done in %s' % (
+            done, len(results),
+            self.output.format_seconds(now - self.start_time))
+        left = self.time_left(results, now)
+        if left is not None and done < len(results):
+            s += ', about %s left' % self.output.format_seconds(left)
+        return s
+
+    def time_left(self, results, now):
+        """Estimate how long it takes to run the remaining layers."""
+        if self.estimates is None:
+            return None
+        left = 0.0
+        for result in results:
+            if result.done:
+                continue
+            estimate = self.estimates[result.layer_name]
+            if result.start_time is not None:
+                estimate = max(estimate - (now - result.start_time), 0.0)
+            left += estimate
+        return left / len(self.workers)
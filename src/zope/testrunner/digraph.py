@@ -14,6 +14,7 @@
 """Directed graph
 """
 
+from array import array
 from itertools import count
 
 
@@ -186,6 +187,116 @@ class DiGraph:
                     visits.extend(self._neighbors.get(node, ()))
 
 
+class ArrayDiGraph:
+    """Directed graph over the nodes ``0``, ..., ``n - 1``.
+
+    The neighbors are stored in compressed sparse row form: the
+    neighbors of node *i* are ``targets[offsets[i]:offsets[i + 1]]``.
+    This needs much less memory than ``DiGraph`` and is faster for
+    large graphs, like the garbage of a test.
+    """
+
+    def __init__(self, offsets, targets):
+        self.offsets = offsets
+        self.targets = targets
+
+    @classmethod
+    def from_objects(cls, objects, get_neighbors):
+        """the graph of *objects* (a sequence) related by *get_neighbors*.
+
+        Node *i* represents ``objects[i]``; neighbors which are not
+        in *objects* are ignored.
+        """
+        index = {id(obj): i for i, obj in enumerate(objects)}
+        get = index.get
+        offsets = array("q", [0])
+        targets = array("q")
+        append = targets.append
+        for obj in objects:
+            for neighbor in get_neighbors(obj):
+                i = get(id(neighbor))
+                if i is not None:
+                    append(i)
+            offsets.append(len(targets))
+        return cls(offsets, targets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def nodes(self):
+        """iterate over the graph's nodes."""
+        return iter(range(len(self)))
+
+    def neighbors(self, node):
+        """iterate over *node*'s neighbors."""
+        return iter(self.targets[self.offsets[node]:self.offsets[node + 1]])
+
+    def sccs(self, trivial=False):
+        """iterate over the strongly connected components.
+
+        If *trivial*, include the trivial components; otherwise
+        only the cycles.
+
+        This is an iterative implementation of the "Tarjan SCC"
+        algorithm working on arrays.
+        """
+        offsets = self.offsets
+        targets = self.targets
+        size = len(self)
+        dfs = array("q", [-1]) * size  # depth first search visit order
+        low = array("q", [0]) * size
+        stacked = bytearray(size)
+        stack = []  # the nodes which might still be on a cycle
+        visits = count()
+
+        for root in range(size):
+            if dfs[root] >= 0:
+                continue
+            dfs[root] = low[root] = next(visits)
+            stack.append(root)
+            stacked[root] = 1
+            # the path to the currently processed node, and for each
+            # node on it the position of the next neighbor to process
+            path = [root]
+            positions = [offsets[root]]
+            while path:
+                node = path[-1]
+                i = positions[-1]
+                end = offsets[node + 1]
+                while i < end:
+                    neighbor = targets[i]
+                    i += 1
+                    if dfs[neighbor] < 0:
+                        break  # visit *neighbor* first
+                    if stacked[neighbor] and dfs[neighbor] < low[node]:
+                        low[node] = dfs[neighbor]
+                else:
+                    # all neighbors processed, return from *node*
+                    path.pop()
+                    positions.pop()
+                    if low[node] == dfs[node]:
+                        # SCC root
+                        scc = []
+                        while True:
+                            member = stack.pop()
+                            stacked[member] = 0
+                            scc.append(member)
+                            if member == node:
+                                break
+                        if (trivial or len(scc) > 1
+                                or node in self.neighbors(node)):
+                            yield scc
+                    if path and low[node] < low[path[-1]]:
+                        low[path[-1]] = low[node]
+                    continue
+                positions[-1] = i
+                dfs[neighbor] = low[neighbor] = next(visits)
+                stack.append(neighbor)
+                stacked[neighbor] = 1
+                path.append(neighbor)
+                positions.append(offsets[neighbor])
+
+
 class _TarjanState:
     """representation of a node's processing state."""
     __slots__ = "stacked dfs low".split()
@@ -29,25 +29,9 @@ class Filter(zope.testrunner.feature.Feature):
 
     def global_setup(self):
         layers = self.runner.tests_by_layer_name
-        options = self.runner.options
-
-        if UNITTEST_LAYER in layers:
-            # We start out assuming unit tests should run and look for reasons
-            # why they shouldn't be run.
-            should_run = True
-            if (not options.non_unit):
-                if options.layer:
-                    accept = build_filtering_func(options.layer)
-                    should_run = accept(UNITTEST_LAYER)
-                else:
-                    should_run = True
-            else:
-                should_run = False
-
-            if not should_run:
-                layers.pop(UNITTEST_LAYER)
 
         if self.runner.options.resume_layer is not None:
+            remove_unit_tests(layers, self.runner.options)
             for name in list(layers):
                 if name != self.runner.options.resume_layer:
                     layers.pop(name)
@@ -58,12 +42,8 @@ class Filter(zope.testrunner.feature.Feature):
                     ("subprocess failed for %s" %
                         self.runner.options.resume_layer,
                      None))
-        elif self.runner.options.layer:
-            accept = build_filtering_func(self.runner.options.layer)
-            for name in list(layers):
-                if not accept(name):
-                    # No pattern matched this name so we remove it
-                    layers.pop(name)
+        else:
+            select_layers(layers, self.runner.options)
 
         if (self.runner.options.verbose and
                 not self.runner.options.resume_layer):
@@ -91,6 +71,39 @@ class Filter(zope.testrunner.feature.Feature):
                 self.runner.failures)
 
 
+def remove_unit_tests(layers, options):
+    """Remove the unit tests from *layers* unless they should run."""
+    if UNITTEST_LAYER in layers:
+        # We start out assuming unit tests should run and look for reasons
+        # why they shouldn't be run.
+        should_run = True
+        if (not options.non_unit):
+            if options.layer:
+                accept = build_filtering_func(options.layer)
+                should_run = accept(UNITTEST_LAYER)
+            else:
+                should_run = True
+        else:
+            should_run = False
+
+        if not should_run:
+            layers.pop(UNITTEST_LAYER)
+
+
+def select_layers(layers, options):
+    """Remove the layers not selected by the options from *layers*.
+
+    *layers* maps layer names to test suites.
+    """
+    remove_unit_tests(layers, options)
+    if options.layer:
+        accept = build_filtering_func(options.layer)
+        for name in list(layers):
+            if not accept(name):
+                # No pattern matched this name so we remove it
+                layers.pop(name)
+
+
 def build_filtering_func(patterns):
     """Build a filtering function from a set of patterns
 
@@ -26,6 +26,9 @@ from zope.testrunner.filter import build_filtering_func
 
 
 identifier = re.compile(r'[_a-z]\w*$', re.I).match
+dotted_name = re.compile(r'[_a-z]\w*(\.[_a-z]\w*)+$', re.I).match
+# The name of a test as shown by --list-tests, e.g. "test_foo (pkg.mod.C)"
+test_name_with_id = re.compile(r'\S+ \((\S+)\)$').match
 IGNORE_FOLDERS = {
     '.git',
     'node_modules',
@@ -179,26 +182,103 @@ def find_tests(options, found_suites=None):
     test_accept = build_filtering_func(options.test)
     module_accept = build_filtering_func(options.module)
 
+    # The requested test ids which were seen so far, see
+    # find_suites_for_test_ids.
+    found_test_ids = set()
     if found_suites is None:
-        found_suites = find_suites(options, accept=module_accept)
+        if options.test_ids is None:
+            found_suites = find_suites(options, accept=module_accept)
+        else:
+            found_suites = find_suites_for_test_ids(
+                options, options.test_ids, found_test_ids,
+                accept=module_accept)
     for suite in found_suites:
-        for test, layer_name in tests_from_suite(suite, options,
-                                                 accept=test_accept,
-                                                 duplicated_test_ids=dupe_ids):
+        for test, layer_name in tests_from_suite(
+                suite, options, accept=test_accept,
+                duplicated_test_ids=dupe_ids, test_ids=options.test_ids,
+                found_test_ids=found_test_ids):
             if dupe_ids:
                 # If there are any duplicated test IDs, we stop trying to
                 # load tests; we'll raise an error later on with all the
                 # duplicates in it.
                 continue
-            suite = suites.get(layer_name)
-            if not suite:
-                suite = suites[layer_name] = unittest.TestSuite()
-            suite.addTest(test)
+            tests = suites.get(layer_name)
+            if tests is None:
+                tests = suites[layer_name] = []
+            tests.append(test)
     if dupe_ids:
         message_lines = ['Duplicate test IDs found:'] + sorted(dupe_ids)
         message = '\n  '.join(message_lines)
         raise DuplicateTestIDError(message)
-    return suites
+    return {layer_name: LayerSuite(tests)
+            for layer_name, tests in suites.items()}
+
+
+class LayerSuite(unittest.TestSuite):
+    """The tests of a layer, as a flat suite.
+
+    The tests are taken over as they are: they come from
+    tests_from_suite, so they are neither suites nor need to be checked
+    one by one again.
+    """
+
+    def __init__(self, tests=()):
+        super().__init__()
+        self._tests = list(tests)
+
+
+def possible_test_modules(test_ids):
+    """Return the names of the modules which may contain the given tests.
+
+    A test id starts with the dotted name of the module which defines the
+    test, so only the dotted prefixes of the ids are candidates.  Returns
+    None (meaning "any module") if some id is not a dotted name.
+
+    >>> sorted(possible_test_modules(['a.b.C.test_x', 'test_y (a.d.E)']))
+    ['a', 'a.b', 'a.b.C', 'a.d']
+    >>> print(possible_test_modules(['a.b.C.test_x', 'doc/file.rst']))
+    None
+    """
+    modules = set()
+    for test_id in test_ids:
+        m = test_name_with_id(test_id)
+        if m is not None:
+            test_id = m.group(1)
+        if not dotted_name(test_id):
+            return None
+        parts = test_id.split('.')
+        for i in range(1, len(parts)):
+            modules.add('.'.join(parts[:i]))
+    return modules
+
+
+def find_suites_for_test_ids(options, test_ids, found_test_ids,
+                             accept=None):
+    """Yield the test suites of the test modules which may contain tests.
+
+    The modules which may define the tests with the given *test_ids* are
+    imported first.  A test can also be collected by the test suite of
+    another module, though (for example a DocTestSuite of a module which is
+    not a test module), so unless the caller added all of them to
+    *found_test_ids* while consuming the suites, the other test modules are
+    imported afterwards.
+    """
+    modules = possible_test_modules(test_ids)
+    if modules is None:
+        yield from find_suites(options, accept)
+        return
+
+    def defining(module_name):
+        return module_name in modules and (
+            accept is None or accept(module_name))
+
+    def others(module_name):
+        return module_name not in modules and (
+            accept is None or accept(module_name))
+
+    yield from find_suites(options, defining)
+    if not test_ids <= found_test_ids:
+        yield from find_suites(options, others)
 
 
 def find_suites(options, accept=None):
@@ -437,17 +517,20 @@ def import_name(name):
 def tests_from_suite(suite, options, dlevel=1,
                      dlayer=zope.testrunner.layer.UnitTests,
                      accept=None,
-                     seen_test_ids=None, duplicated_test_ids=None):
+                     seen_test_ids=None, duplicated_test_ids=None,
+                     test_ids=None, found_test_ids=None):
     """Returns a sequence of (test, layer_name)
 
-    The tree of suites is recursively visited, with the most specific
+    The tree of suites is visited depth first, with the most specific
     layer taking precedence. So if a TestCase with a layer of 'foo' is
     contained in a TestSuite with a layer of 'bar', the test case would be
     returned with 'foo' as the layer.
 
     Tests are also filtered out based on the test level and accept predicate.
     accept is a function, returning boolean for given test name (see also
-    build_filtering_func()).
+    build_filtering_func()).  If test_ids is given, only tests whose id or
+    name is contained in it are returned, and their ids and names are
+    added to found_test_ids.
     """
     # We use this to track the test IDs that have been registered.
     # tests_from_suite will complain if it encounters the same test ID
@@ -457,35 +540,51 @@ def tests_from_suite(suite, options, dlevel=1,
     if duplicated_test_ids is None:
         duplicated_test_ids = set()
 
-    level = getattr(suite, 'level', dlevel)
-    layer = getattr(suite, 'layer', dlayer)
-    if not isinstance(layer, str):
-        layer = name_from_layer(layer)
-
-    if isinstance(suite, unittest.TestSuite):
-        for possible_suite in suite:
-            yield from tests_from_suite(
-                possible_suite, options, level, layer,
-                accept=accept,
-                seen_test_ids=seen_test_ids,
-                duplicated_test_ids=duplicated_test_ids)
-    elif isinstance(suite, StartUpFailure):
-        yield (suite, None)
-    else:
-        if options.require_unique_ids:
-            suite_id = str(suite)
-            if suite_id in seen_test_ids:
-                duplicated_test_ids.add(suite_id)
+    only_level = options.only_level
+    at_level = options.at_level
+    require_unique_ids = options.require_unique_ids
+
+    # Suites may be nested deeply, so we walk the tree with an explicit
+    # stack of (iterator, level, layer name) instead of recursing.
+    end = object()
+    stack = [(iter((suite,)), dlevel, dlayer)]
+    while stack:
+        tests, dlevel, dlayer = stack[-1]
+        test = next(tests, end)
+        if test is end:
+            stack.pop()
+            continue
+
+        level = getattr(test, 'level', dlevel)
+        layer = getattr(test, 'layer', dlayer)
+        if not isinstance(layer, str):
+            layer = name_from_layer(layer)
+
+        if isinstance(test, unittest.TestSuite):
+            stack.append((iter(test), level, layer))
+            continue
+        if isinstance(test, StartUpFailure):
+            yield (test, None)
+            continue
+
+        name = str(test)
+        if require_unique_ids:
+            if name in seen_test_ids:
+                duplicated_test_ids.add(name)
             else:
-                seen_test_ids.add(suite_id)
-        if options.only_level is None:
-            if options.at_level <= 0 or level <= options.at_level:
-                if accept is None or accept(str(suite)):
-                    yield (suite, layer)
-        else:
-            if level == options.only_level:
-                if accept is None or accept(str(suite)):
-                    yield (suite, layer)
+                seen_test_ids.add(name)
+        if test_ids is not None:
+            if name not in test_ids and test.id() not in test_ids:
+                continue
+            if found_test_ids is not None:
+                found_test_ids.update((name, test.id()))
+        if only_level is None:
+            if at_level > 0 and level > at_level:
+                continue
+        elif level != only_level:
+            continue
+        if accept is None or accept(name):
+            yield (test, layer)
 
 
 _layer_name_cache = {}
@@ -14,25 +14,36 @@
 """Output formatting.
 """
 import doctest
+import functools
 import io
+import json
 import os
 import re
 import socket
 import sys
+import tarfile
 import tempfile
+import threading
+import time
 import traceback
+import zlib
 from collections.abc import MutableMapping
 from contextlib import contextmanager
-from contextlib import suppress
 from dataclasses import dataclass
 from dataclasses import field
 from datetime import datetime
 from datetime import timedelta
+from datetime import timezone
 from pathlib import Path
 from xml.etree import ElementTree
+from xml.sax.saxutils import XMLGenerator
 
+from zope.testrunner.compression import SUFFIXES
+from zope.testrunner.compression import CompressedWriter
 from zope.testrunner.exceptions import DocTestFailureException
 from zope.testrunner.find import StartUpFailure
+from zope.testrunner.tb_format import format_tb
+from zope.testrunner.tb_format import traceback_key
 
 
 try:
@@ -68,6 +79,18 @@ class OutputFormatter:
         self.options = options
         self.last_width = 0
         self.compute_max_width()
+        # When the progress status was last written, and the arguments of
+        # the start_test() call whose progress status was not written yet
+        self._last_progress = None
+        self._pending_progress = None
+        # When sys.stdout was last flushed, and the number of tests whose
+        # heartbeat dots were not written to the parent process yet
+        self._last_flush = None
+        self._last_heartbeat = None
+        self._heartbeat_dots = 0
+        # Tests by the traceback_key() of their tracebacks, with the number
+        # of tests which failed with them (see print_test_traceback)
+        self._tracebacks = {}
 
     progress = property(lambda self: self.options.progress)
     verbose = property(lambda self: self.options.verbose)
@@ -76,6 +99,40 @@ class OutputFormatter:
             self.options.resume_layer is not None and
             self.options.processes > 1))
 
+    def flush(self, force=False):
+        """Flush sys.stdout.
+
+        Unless `force` is true, do it only if it was not flushed in the last
+        ``--flush-interval`` seconds.  Output written in between stays in
+        the buffer of sys.stdout, which writes it when it is full.
+        """
+        now = time.monotonic()
+        interval = getattr(self.options, 'flush_interval', 0)
+        if (not force and interval and self._last_flush is not None
+                and now - self._last_flush < interval):
+            return
+        self._last_flush = now
+        sys.stdout.flush()
+
+    def heartbeat(self, n_tests):
+        """Tell the parent process that `n_tests` more tests were started.
+
+        The parent process shows this activity as dots.  The dots are
+        collected and written as a line at most every ``--flush-interval``
+        seconds instead of for every test.
+        """
+        self._heartbeat_dots += n_tests
+        now = time.monotonic()
+        interval = getattr(self.options, 'flush_interval', 0)
+        if (n_tests and interval and self._last_heartbeat is not None
+                and now - self._last_heartbeat < interval):
+            return
+        if self._heartbeat_dots:
+            self._last_heartbeat = now
+            sys.stdout.write('.' * self._heartbeat_dots + '\n')
+            self._heartbeat_dots = 0
+            self.flush(force=True)
+
     def compute_max_width(self):
         """Try to determine the terminal width."""
         # Note that doing this every time is more test friendly.
@@ -221,10 +278,29 @@ class OutputFormatter:
         if cycles:
             print("The following test left cyclic garbage behind:")
             print(test)
-            for i, cy in enumerate(cycles):
-                print("Cycle", i + 1)
-                for oi in cy:
-                    print(" * ", "\n   ".join(oi))
+            self._print_cycles(cycles)
+
+    def _print_cycles(self, cycles):
+        """Print cycles described by ``runner.describe_cycles``."""
+        for i, cy in enumerate(cycles):
+            if isinstance(cy, str):
+                # a summary of the remaining cycles
+                print(cy)
+                continue
+            print("Cycle", i + 1)
+            for oi in cy:
+                print(" * ", "\n   ".join(oi))
+
+    def sampled_cycles(self, tests, gccount, cycles):
+        """Report cyclic garbage found after running several tests."""
+        if self.verbose == 1:
+            print()
+        print("A full collection found cyclic garbage [%d] left behind by"
+              " one of the following tests:" % gccount)
+        for test in tests:
+            print("  " + test)
+        if cycles:
+            self._print_cycles(cycles)
 
     def refcounts(self, rc, prev):
         """Report a change in reference counts."""
@@ -238,13 +314,19 @@ class OutputFormatter:
               % (track.n, rc, rc - prev))
         track.output()
 
+    def leaks(self, track):
+        """Report a change in the number of live objects."""
+        print("  live objects=%-8d change=%-6d" % (track.n, track.change))
+        if self.verbose:
+            track.output()
+
     def start_set_up(self, layer_name):
         """Report that we're setting up a layer.
 
         The next output operation should be stop_set_up().
         """
         print("  Set up %s" % layer_name, end=' ')
-        sys.stdout.flush()
+        self.flush(force=True)
 
     def stop_set_up(self, seconds):
         """Report that we've set up a layer.
@@ -260,7 +342,7 @@ class OutputFormatter:
         tear_down_not_supported().
         """
         print("  Tear down %s" % layer_name, end=' ')
-        sys.stdout.flush()
+        self.flush(force=True)
 
     def stop_tear_down(self, seconds):
         """Report that we've tore down a layer.
@@ -283,6 +365,26 @@ class OutputFormatter:
         test_failure().
         """
         self.test_width = 0
+        if self.progress:
+            rate = getattr(self.options, 'progress_rate', 0)
+            now = time.monotonic()
+            if (rate and tests_run < total_tests
+                    and self._last_progress is not None
+                    and now - self._last_progress < 1 / rate):
+                # Only write it if the test fails.
+                self._pending_progress = (test, tests_run, total_tests)
+                return
+            self._last_progress = now
+        self._write_start_test(test, tests_run, total_tests)
+
+    def _write_pending_progress(self):
+        """Write the progress status start_test() skipped (if any)."""
+        if self._pending_progress is not None:
+            self._last_progress = time.monotonic()
+            self._write_start_test(*self._pending_progress)
+            self._pending_progress = None
+
+    def _write_start_test(self, test, tests_run, total_tests):
         if self.progress:
             if self.last_width:
                 sys.stdout.write('\r' + (' ' * self.last_width) + '\r')
@@ -301,10 +403,9 @@ class OutputFormatter:
             sys.stdout.write('.' * test.countTestCases())
 
         elif self.in_subprocess:
-            sys.stdout.write('.' * test.countTestCases())
-            # Give the parent process a new line so it sees the progress
-            # in a timely manner.
-            sys.stdout.write('\n')
+            # Give the parent process a line so it sees the progress in a
+            # timely manner.
+            self.heartbeat(test.countTestCases())
 
         if self.verbose > 1:
             s = str(test)
@@ -312,7 +413,8 @@ class OutputFormatter:
             sys.stdout.write(s)
             self.test_width += len(s) + 1
 
-        sys.stdout.flush()
+        # Show which test is running if it is shown at all.
+        self.flush(force=self.progress or self.verbose > 1)
 
     def test_success(self, test, seconds):
         """Report that a test was successful.
@@ -321,7 +423,7 @@ class OutputFormatter:
 
         The next output operation should be stop_test().
         """
-        if self.verbose > 2:
+        if self.verbose > 2 and self._pending_progress is None:
             s = " (%s)" % self.format_seconds_short(seconds)
             sys.stdout.write(s)
             self.test_width += len(s) + 1
@@ -333,6 +435,8 @@ class OutputFormatter:
 
         The next output operation should be stop_test().
         """
+        if self._pending_progress is not None:
+            return
         if self.verbose > 2:
             s = " (skipped: %s)" % reason
         elif self.verbose > 1:
@@ -349,12 +453,15 @@ class OutputFormatter:
 
         The next output operation should be stop_test().
         """
+        self._write_pending_progress()
         if self.verbose > 2:
             print(" (%s)" % self.format_seconds_short(seconds))
         print()
-        self.print_traceback("Error in test %s" % test, exc_info)
+        self.print_test_traceback("Error in test %s" % test, test, exc_info)
         self.print_std_streams(stdout, stderr)
         self.test_width = self.last_width = 0
+        # Show the traceback before the post-mortem debugger is started.
+        self.flush(force=True)
 
     def test_failure(self, test, seconds, exc_info, stdout=None, stderr=None):
         """Report that a test failed.
@@ -363,12 +470,15 @@ class OutputFormatter:
 
         The next output operation should be stop_test().
         """
+        self._write_pending_progress()
         if self.verbose > 2:
             print(" (%s)" % self.format_seconds_short(seconds))
         print()
-        self.print_traceback("Failure in test %s" % test, exc_info)
+        self.print_test_traceback("Failure in test %s" % test, test, exc_info)
         self.print_std_streams(stdout, stderr)
         self.test_width = self.last_width = 0
+        # Show the traceback before the post-mortem debugger is started.
+        self.flush(force=True)
 
     def print_traceback(self, msg, exc_info):
         """Report an error with a traceback."""
@@ -376,6 +486,28 @@ class OutputFormatter:
         print(msg)
         print(self.format_traceback(exc_info))
 
+    def print_test_traceback(self, msg, test, exc_info):
+        """Report the traceback of a failing test.
+
+        With --deduplicate-tracebacks, a traceback which is the same as the
+        one of an earlier test is not formatted and printed again.
+        """
+        if not getattr(self.options, 'deduplicate_tracebacks', False):
+            self.print_traceback(msg, exc_info)
+            return
+        key = traceback_key(*exc_info)
+        seen = self._tracebacks.get(key) if key is not None else None
+        if seen is None:
+            if key is not None:
+                self._tracebacks[key] = [str(test), 1]
+            self.print_traceback(msg, exc_info)
+            return
+        seen[1] += 1
+        print()
+        print(msg)
+        print("Same traceback as in test %s (%d times)" % tuple(seen))
+        print()
+
     def print_std_streams(self, stdout, stderr):
         """Emit contents of buffered standard streams."""
         if stdout:
@@ -411,6 +543,13 @@ class OutputFormatter:
 
     def stop_test(self, test, gccount):
         """Clean up the output state after a test."""
+        if self._pending_progress is not None:
+            if not (gccount and self.verbose):
+                # Nothing was written for this test.
+                self._pending_progress = None
+                return
+            # The garbage collected is reported with the test's status.
+            self._write_pending_progress()
         if gccount and self.verbose:
             s = "!" if self.verbose == 1 else " [%d]" % gccount
             self.test_width += len(s)
@@ -419,7 +558,7 @@ class OutputFormatter:
             self.last_width = self.test_width
         elif self.verbose > 1:
             print()
-        sys.stdout.flush()
+        self.flush()
 
     def stop_tests(self):
         """Clean up the output state after a collection of tests."""
@@ -427,6 +566,9 @@ class OutputFormatter:
             sys.stdout.write('\r' + (' ' * self.last_width) + '\r')
         if self.verbose == 1 or self.progress:
             print()
+        if self.in_subprocess:
+            self.heartbeat(0)
+        self.flush(force=True)
 
 
 def tigetnum(attr, default=None):
@@ -575,6 +717,8 @@ class ColorfulOutputFormatter(OutputFormatter):
 
         The next output operation should be stop_test().
         """
+        if self._pending_progress is not None:
+            return
         if self.verbose > 2:
             s = " ({}skipped: {}{})".format(
                 self.color('skipped'), reason, self.color('info'))
@@ -792,8 +936,10 @@ try:
     import testtools
     from testtools.content import Content
     from testtools.content import ContentType
+    from testtools.content import TracebackContent
     from testtools.content import content_from_file
     from testtools.content import text_content
+    from testtools.tags import TagContext
     testtools.StreamToExtendedDecorator
 except (ImportError, AttributeError):
     testtools = None
@@ -862,6 +1008,201 @@ class _SortedDict(MutableMapping):
         return len(self._dict)
 
 
+def _encode_number(value):
+    """Encode a number as a subunit v2 variable length integer."""
+    if value < 0x40:
+        return bytes((value,))
+    elif value < 0x4000:
+        return (value | 0x4000).to_bytes(2, 'big')
+    elif value < 0x400000:
+        return (value | 0x800000).to_bytes(3, 'big')
+    elif value < 0x40000000:
+        return (value | 0xC0000000).to_bytes(4, 'big')
+    raise ValueError(f'value too large to encode: {value!r}')
+
+
+def _encode_utf8(string):
+    utf8 = string.encode('utf-8')
+    return _encode_number(len(utf8)) + utf8
+
+
+class _StreamResultToBytes:
+    """Encode StreamResult events as subunit v2 packets.
+
+    This writes the same bytes as subunit.StreamResultToBytes, but costs
+    much less per event.  Like _RunnableDecorator, it marks the events as
+    runnable or not according to setRunnable.
+    """
+
+    STATUS = {
+        None: 0x0,
+        'exists': 0x1,
+        'inprogress': 0x2,
+        'success': 0x3,
+        'uxsuccess': 0x4,
+        'skip': 0x5,
+        'fail': 0x6,
+        'xfail': 0x7,
+    }
+    EPOCH = datetime.fromtimestamp(0, timezone.utc)
+
+    setRunnable = _RunnableDecorator.setRunnable
+
+    def __init__(self, stream):
+        if sys.platform == 'win32' and hasattr(stream, 'fileno'):
+            # Win32 mangles \r\n to \n and that breaks streams.
+            import msvcrt
+            msvcrt.setmode(stream.fileno(), os.O_BINARY)
+        try:
+            stream.write(b'')
+        except TypeError:
+            stream = stream.buffer
+        self.stream = stream
+        self._runnable = True
+
+    def startTestRun(self):
+        pass
+
+    def stopTestRun(self):
+        pass
+
+    def status(self, test_id=None, test_status=None, test_tags=None,
+               runnable=True, file_name=None, file_bytes=None, eof=False,
+               mime_type=None, route_code=None, timestamp=None):
+        flags = 0x2000 | self.STATUS[test_status]  # version 2
+        parts = []
+        if timestamp is not None:
+            flags |= 0x0200
+            since_epoch = timestamp - self.EPOCH
+            parts.append((since_epoch.seconds
+                          + since_epoch.days * 86400).to_bytes(4, 'big'))
+            parts.append(_encode_number(since_epoch.microseconds * 1000))
+        if test_id is not None:
+            flags |= 0x0800
+            parts.append(_encode_utf8(test_id))
+        if test_tags:
+            flags |= 0x0080
+            parts.append(_encode_number(len(test_tags)))
+            parts.extend(_encode_utf8(tag) for tag in test_tags)
+        if self._runnable:
+            flags |= 0x0100
+        if mime_type:
+            flags |= 0x0020
+            parts.append(_encode_utf8(mime_type))
+        if file_name is not None:
+            flags |= 0x0040
+            parts.append(_encode_utf8(file_name))
+            parts.append(_encode_number(len(file_bytes)))
+            parts.append(file_bytes)
+        if eof:
+            flags |= 0x0010
+        if route_code is not None:
+            flags |= 0x0400
+            parts.append(_encode_utf8(route_code))
+        body = b''.join(parts)
+        # signature, flags, the body and the CRC32
+        length = len(body) + 7
+        if length <= 62:
+            length += 1
+        elif length <= 16381:
+            length += 2
+        elif length <= 4194300:
+            length += 3
+        else:
+            raise ValueError(f'Length too long: {length!r}')
+        packet = b''.join(
+            (b'\xb3', flags.to_bytes(2, 'big'), _encode_number(length), body))
+        self.stream.write(
+            packet + (zlib.crc32(packet) & 0xFFFFFFFF).to_bytes(4, 'big'))
+        self.stream.flush()
+
+
+class _ExtendedToStream:
+    """Convert the extended TestResult API used by SubunitOutputFormatter to
+    StreamResult events.
+
+    This emits the same events as testtools.ExtendedToStreamDecorator, but
+    without its overhead, like keeping a summary of all the test results.
+    """
+
+    def __init__(self, decorated):
+        self.decorated = decorated
+        self.status = decorated.status
+        self.setRunnable = decorated.setRunnable
+        self._tags = TagContext()
+        self._time = None
+
+    def startTestRun(self):
+        self.decorated.startTestRun()
+
+    @property
+    def current_tags(self):
+        if self._tags is None:
+            return set()
+        return self._tags.get_current_tags()
+
+    def tags(self, new_tags, gone_tags):
+        if self._tags is not None:
+            self._tags.change_tags(new_tags, gone_tags)
+
+    def time(self, a_datetime):
+        self._time = a_datetime
+
+    def _now(self):
+        if self._time is None:
+            return datetime.now(UTC)
+        return self._time
+
+    def startTest(self, test):
+        self.status(test_id=test.id(), test_status='inprogress',
+                    timestamp=self._now())
+        self._tags = TagContext(self._tags)
+
+    def stopTest(self, test):
+        if self._tags is not None:
+            self._tags = self._tags.parent
+
+    def _convert(self, test, err, details, status, reason=None):
+        test_id = test.id()
+        now = self._now()
+        if err is not None:
+            details = {'traceback': TracebackContent(err, test)}
+        if details is not None:
+            for name, content in details.items():
+                mime_type = repr(content.content_type)
+                file_bytes = None
+                for next_bytes in content.iter_bytes():
+                    if file_bytes is not None:
+                        self.status(
+                            file_name=name, file_bytes=file_bytes,
+                            mime_type=mime_type, test_id=test_id,
+                            timestamp=now)
+                    file_bytes = next_bytes
+                if file_bytes is None:
+                    file_bytes = b''
+                self.status(
+                    file_name=name, file_bytes=file_bytes, eof=True,
+                    mime_type=mime_type, test_id=test_id, timestamp=now)
+        if reason is not None:
+            self.status(
+                file_name='reason', file_bytes=reason.encode('utf8'),
+                eof=True, mime_type='text/plain; charset=utf8',
+                test_id=test_id, timestamp=now)
+        self.status(test_id=test_id, test_status=status,
+                    test_tags=self.current_tags, timestamp=now)
+
+    def addError(self, test, err=None, details=None):
+        self._convert(test, err, details, 'fail')
+
+    addFailure = addError
+
+    def addSkip(self, test, reason=None, details=None):
+        self._convert(test, None, details, 'skip', reason)
+
+    def addSuccess(self, test, details=None):
+        self._convert(test, None, details, 'success')
+
+
 class SubunitOutputFormatter:
     """A subunit output formatter.
 
@@ -891,6 +1232,7 @@ class SubunitOutputFormatter:
     TAG_GARBAGE = 'zope:garbage'
     TAG_THREADS = 'zope:threads'
     TAG_REFCOUNTS = 'zope:refcounts'
+    TAG_LEAKS = 'zope:leaks'
 
     def __init__(self, options, stream=None):
         if subunit is None:
@@ -901,8 +1243,7 @@ class SubunitOutputFormatter:
 
         if stream is None:
             stream = sys.stdout
-        self._stream = stream
-        self._subunit = self._subunit_factory(self._stream)
+        self.set_stream(stream)
 
         # Used to track the last layer that was set up or torn down. Either
         # None or (layer_name, last_touched_time).
@@ -915,6 +1256,14 @@ class SubunitOutputFormatter:
             'application', 'x-binary-profile')
         self.PLAIN_TEXT = ContentType('text', 'plain', {'charset': 'utf8'})
 
+    def set_stream(self, stream):
+        """Write the subunit stream to the given stream.
+
+        This must be done before anything is written.
+        """
+        self._stream = stream
+        self._subunit = self._subunit_factory(self._stream)
+
     @classmethod
     def _subunit_factory(cls, stream):
         """Return a TestResult attached to the given stream."""
@@ -1124,6 +1473,10 @@ class SubunitOutputFormatter:
         """Report cycles left behind by a test."""
         pass  # not implemented
 
+    def sampled_cycles(self, tests, gccount, cycles):
+        """Report cyclic garbage found after running several tests."""
+        pass  # not implemented
+
     def refcounts(self, rc, prev):
         """Report a change in reference counts."""
         details = _SortedDict({
@@ -1142,6 +1495,15 @@ class SubunitOutputFormatter:
         })
         self._emit_fake_test(self.TAG_REFCOUNTS, self.TAG_REFCOUNTS, details)
 
+    def leaks(self, track):
+        """Report a change in the number of live objects."""
+        details = _SortedDict({
+            'live-objects': text_content(str(track.n)),
+            'changes': text_content(str(track.change)),
+            'track': text_content(str(track.delta)),
+        })
+        self._emit_fake_test(self.TAG_LEAKS, self.TAG_LEAKS, details)
+
     def start_set_up(self, layer_name):
         """Report that we're setting up a layer.
 
@@ -1327,10 +1689,7 @@ class SubunitV2OutputFormatter(SubunitOutputFormatter):
     @classmethod
     def _subunit_factory(cls, stream):
         """Return a TestResult attached to the given stream."""
-        stream_result = _RunnableDecorator(subunit.StreamResultToBytes(stream))
-        result = testtools.ExtendedToStreamDecorator(stream_result)
-        # Lift our decorating method up so that we can get at it easily.
-        result.setRunnable = stream_result.setRunnable
+        result = _ExtendedToStream(_StreamResultToBytes(stream))
         result.startTestRun()
         return result
 
@@ -1370,12 +1729,31 @@ class TestSuiteInfo:
 @dataclass
 class TestCaseInfo:
 
-    test: object
     time: float
     testClassName: str
     testName: str
-    failure: bool = None
-    error: bool = None
+    # (type, message, stack trace) strings of the failure or error
+    failure: tuple = None
+    error: tuple = None
+
+
+def format_exc_info(exc_info):
+    """Format exc_info for the XML reports.
+
+    Returns the type, the message and the stack trace as strings, so that
+    neither the exception nor the traceback (with all its frames) need to
+    be kept until the report is written.
+    """
+    excType, excInstance, tb = exc_info
+    try:
+        try:
+            errorMessage = str(excInstance)
+        except UnicodeEncodeError:
+            errorMessage = 'Could not extract error str for unicode error'
+        stackTrace = format_tb(tb)
+    finally:  # Avoids a memory leak
+        del tb
+    return str(excType), errorMessage, stackTrace
 
 
 def get_test_class_name(test):
@@ -1384,11 +1762,16 @@ def get_test_class_name(test):
 
 
 def filename_to_suite_name_parts(filename):
+    return _filename_to_suite_name_parts(filename, os.getcwd())
+
+
+@functools.lru_cache(maxsize=1024)
+def _filename_to_suite_name_parts(filename, cwd):
     # lop off whatever portion of the path we have in common
     # with the current working directory; crude, but about as
     # much as we can do :(
     filenameParts = Path(filename).parts
-    cwdParts = Path.cwd().parts
+    cwdParts = Path(cwd).parts
     longest = min(len(filenameParts), len(cwdParts))
     for i in range(longest):
         if filenameParts[i] != cwdParts[i]:
@@ -1408,7 +1791,8 @@ def filename_to_suite_name_parts(filename):
 
         # don't lose the filename, which would have a . in it
         suiteNameParts.append(filenameParts[-1])
-        return suiteNameParts
+        # A tuple, as it is shared by all callers.
+        return tuple(suiteNameParts)
 
 
 def parse_doc_file_case(test):
@@ -1462,15 +1846,76 @@ def parse_unittest(test):
     return testSuite, testName, testClassName
 
 
+_parsers = [parse_doc_file_case,
+            parse_doc_test_case,
+            parse_manuel,
+            parse_startup_failure,
+            parse_unittest]
+
+# test class -> parser which handled the first test of the class
+_parsers_by_class = {}
+
+
+def parse_test(test):
+    """Compute the test suite name, test name and test class name of a test
+    for the XML reports.
+    """
+    parser = _parsers_by_class.get(test.__class__)
+    if parser is not None:
+        testSuite, testName, testClassName = parser(test)
+        if testSuite is not None:
+            return testSuite, testName, testClassName
+
+    for parser in _parsers:
+        testSuite, testName, testClassName = parser(test)
+        if (testSuite, testName, testClassName) != (None, None, None):
+            _parsers_by_class[test.__class__] = parser
+            return testSuite, testName, testClassName
+
+    raise TypeError(
+        'Unknown test type: Could not compute testSuite, testName,'
+        f' testClassName: {test!r}'
+    )
+
+
 class XMLOutputFormattingWrapper:
     """Output formatter which delegates to another formatter for all
-    operations, but also prepares an element tree of test output.
+    operations, but also writes XML reports of test output.
+
+    The report of a test suite is written as soon as all its tests were
+    run (see expect_tests), the remaining ones by writeXMLReports.
+
+    In a layer subprocess, folder is None: instead of writing reports, the
+    outcomes of the tests are sent to the parent process (see
+    report_to_parent), which merges them into its reports.
+
+    If compress is a compression method (see zope.testrunner.compression),
+    the reports are not written as files in the testreports directory but
+    added to a compressed tar archive of it, testreports.tar.gz (or .zst),
+    while they are written.  The archive is called testreports.tar.gz.part
+    until writeXMLReports completes it.  After every report, the compressed
+    data is flushed (at most every flush_interval seconds), so that the
+    archive of a killed test run can be read up to the last report flushed.
+
+    Tests recorded after the report of their suite was written (e.g. by a
+    layer subprocess) are added to that report.  The reports in the
+    archive cannot be changed, so these tests are archived in another
+    report, <suite name>-late.xml, instead.
     """
 
-    def __init__(self, delegate, folder):
+    def __init__(self, delegate, folder, compress=None, flush_interval=0):
         self.delegate = delegate
-        self._testSuites = {}  # test class -> list of test names
+        self._testSuites = {}  # suite name -> TestSuiteInfo
+        self._pending = {}  # suite name -> number of tests still to run
+        self._stopped = {}  # suite name -> number of tests run (subprocess)
+        self._written = set()  # names of the suites already written
+        self._lock = threading.Lock()
         self.folder = folder
+        self.compress = compress
+        self.flush_interval = flush_interval
+        self._archive = None  # (tar file, compressed writer, file, path)
+        self.properties = {}
+        self.hostname = socket.gethostname()
 
     def __getattr__(self, name):
         return getattr(self.delegate, name)
@@ -1505,122 +1950,236 @@ class XMLOutputFormattingWrapper:
                 self._record(test, 0, error=test.exc_info)
         return self.delegate.import_errors(import_errors)
 
-    def _record(self, test, seconds, failure=None, error=None):
-        for parser in [parse_doc_file_case,
-                       parse_doc_test_case,
-                       parse_manuel,
-                       parse_startup_failure,
-                       parse_unittest]:
-            testSuite, testName, testClassName = parser(test)
-            if (testSuite, testName, testClassName) != (None, None, None):
-                break
+    def expect_tests(self, tests, repeat=1):
+        """Announce tests which are going to be run repeat times.
 
-        if (testSuite, testName, testClassName) == (None, None, None):
-            raise TypeError(
-                'Unknown test type: Could not compute testSuite, testName,'
-                f' testClassName: {test!r}'
-            )
+        The report of a test suite is written once all its announced tests
+        were run.
+        """
+        for test in tests:
+            try:
+                testSuite = parse_test(test)[0]
+            except TypeError:
+                continue
+            self._pending[testSuite] = (
+                self._pending.get(testSuite, 0) + repeat)
+
+    def stop_test(self, test, gccount):
+        if self._pending or self.folder is None:
+            try:
+                testSuite = parse_test(test)[0]
+            except TypeError:
+                testSuite = None
+            self._tests_stopped(testSuite, 1)
+        return self.delegate.stop_test(test, gccount)
+
+    def _tests_stopped(self, testSuite, n):
+        if self.folder is None:
+            self._stopped[testSuite] = self._stopped.get(testSuite, 0) + n
+            return
+        with self._lock:
+            pending = self._pending.get(testSuite)
+            if pending is None:
+                return
+            if pending > n:
+                self._pending[testSuite] = pending - n
+                return
+            del self._pending[testSuite]
+            suite = self._testSuites.pop(testSuite, None)
+        if suite is not None:
+            self._write_suite(testSuite, suite)
+
+    def record_previous(self, names, seconds):
+        """Record a test which passed in an earlier test run.
+
+        names are what parse_test returned for the test.
+        """
+        self._add(seconds, *names)
 
-        suite = self._testSuites.setdefault(testSuite, TestSuiteInfo())
-        suite.testCases.append(TestCaseInfo(
-            test, seconds, testClassName, testName, failure, error))
+    def _record(self, test, seconds, failure=None, error=None):
+        testSuite, testName, testClassName = parse_test(test)
+        self._add(seconds, testSuite, testName, testClassName,
+                  failure=failure and format_exc_info(failure),
+                  error=error and format_exc_info(error))
 
-        if failure is not None:
-            suite.failures += 1
+    def _add(self, seconds, testSuite, testName, testClassName,
+             failure=None, error=None):
+        with self._lock:
+            suite = self._testSuites.setdefault(testSuite, TestSuiteInfo())
 
-        if error is not None:
-            suite.errors += 1
+            if failure:
+                suite.failures += 1
 
-        if seconds:
-            suite.time += seconds
+            if error:
+                suite.errors += 1
 
-    def writeXMLReports(self, properties={}):
+            suite.testCases.append(TestCaseInfo(
+                seconds, testClassName, testName, failure, error))
 
-        timestamp = datetime.now().isoformat()
-        hostname = socket.gethostname()
+            if seconds:
+                suite.time += seconds
 
+    def report_to_parent(self, stream=sys.stderr):
+        """Send the outcomes of the tests run in a layer subprocess to its
+        parent process.
+        """
+        suites = {
+            name: [[testCase.testName, testCase.testClassName,
+                    testCase.time, testCase.failure, testCase.error]
+                   for testCase in suite.testCases]
+            for name, suite in self._testSuites.items()}
+        print('xml', json.dumps(dict(suites=suites, stopped=self._stopped),
+                                sort_keys=True),
+              file=stream)
+
+    def merge_from_subprocess(self, line):
+        """Merge the outcomes of tests a layer subprocess sent (see
+        report_to_parent).
+        """
+        data = json.loads(line[len(b'xml '):])
+        for testSuite, testCases in data['suites'].items():
+            for testName, testClassName, seconds, failure, error in testCases:
+                self._add(seconds, testSuite, testName, testClassName,
+                          failure=failure and tuple(failure),
+                          error=error and tuple(error))
+        for testSuite, n in data['stopped'].items():
+            self._tests_stopped(testSuite, n)
+
+    def writeXMLReports(self, properties=None):
+        """Write the reports of the test suites not written yet."""
+        if properties is not None:
+            self.properties = properties
+        while self._testSuites:
+            name, suite = self._testSuites.popitem()
+            if name not in self._written:
+                self._write_suite(name, suite)
+            elif self.compress is None:
+                self._merge_suite(name, suite)
+            else:
+                self._archive_suite(name, suite, f'{name}-late')
+        self._pending.clear()
+        if self._archive is not None:
+            tar, writer, outputFile, partial = self._archive
+            self._archive = None
+            tar.close()
+            writer.close()
+            outputFile.close()
+            os.replace(partial, partial.with_suffix(''))
+
+    def _archive_suite(self, name, suite, filename=None):
+        data = io.BytesIO()
+        self._write_suite_xml(
+            XMLGenerator(data, 'utf-8', short_empty_elements=True),
+            name, suite)
+        info = tarfile.TarInfo(f'testreports/{filename or name}.xml')
+        info.size = data.tell()
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        data.seek(0)
+        with self._lock:
+            if self._archive is None:
+                # The archive is complete once writeXMLReports renames it.
+                partial = self.folder / (
+                    'testreports.tar' + SUFFIXES[self.compress] + '.part')
+                outputFile = open(partial, 'wb')
+                writer = CompressedWriter(
+                    outputFile, self.compress, self.flush_interval)
+                # Not a stream ('w|'), which would keep the end of the
+                # report in its buffer.
+                tar = tarfile.open(fileobj=writer, mode='w')
+                self._archive = (tar, writer, outputFile, partial)
+            tar, writer = self._archive[:2]
+            tar.addfile(info, data)
+            writer.flush()
+
+    def _write_suite(self, name, suite):
+        self._written.add(name)
+        if self.compress is not None:
+            return self._archive_suite(name, suite)
         reportsDir = self.folder / 'testreports'
         reportsDir.mkdir(exist_ok=True)
+        filename = reportsDir / f'{name}.xml'
+        # Write to a temporary file first, so that there are no incomplete
+        # reports if the test run gets killed.
+        partial = reportsDir / f'{name}.xml.part'
+        with open(partial, 'wb') as outputFile:
+            self._write_suite_xml(
+                XMLGenerator(outputFile, 'utf-8', short_empty_elements=True),
+                name, suite)
+        os.replace(partial, filename)
+
+    def _merge_suite(self, name, suite):
+        """Add the test cases of suite to its report written before.
+
+        The test cases of the report are read back, and the report is
+        written again like any other, with all the test cases.
+        """
+        report = ElementTree.parse(
+            self.folder / 'testreports' / f'{name}.xml').getroot()
+        written = TestSuiteInfo(
+            errors=int(report.get('errors')),
+            failures=int(report.get('failures')),
+            time=float(report.get('time')))
+        for testcase in report.iter('testcase'):
+            problems = {}
+            for problem in testcase:
+                # Any split gives the same text when it is written again.
+                errorMessage, _, stackTrace = problem.text.partition('\n\n')
+                problems[problem.tag] = (
+                    problem.get('type'), errorMessage, stackTrace)
+            written.testCases.append(TestCaseInfo(
+                testcase.get('time'), testcase.get('classname'),
+                testcase.get('name'), **problems))
+        written.testCases.extend(suite.testCases)
+        written.errors += suite.errors
+        written.failures += suite.failures
+        written.time += suite.time
+        self._write_suite(name, written)
+
+    def _write_suite_xml(self, xml, name, suite):
+
+        def start(tag, level, **attrs):
+            xml.ignorableWhitespace('\n' + '  ' * level)
+            xml.startElement(tag, attrs)
+
+        def end(tag, level, children=True):
+            if children:
+                xml.ignorableWhitespace('\n' + '  ' * level)
+            xml.endElement(tag)
+
+        xml.startElement('testsuite', {
+            'tests': str(suite.tests),
+            'errors': str(suite.errors),
+            'failures': str(suite.failures),
+            'hostname': self.hostname,
+            'name': name,
+            'time': str(suite.time),
+            'timestamp': datetime.now().isoformat(),
+        })
 
-        for name, suite in self._testSuites.items():
-            filename = reportsDir / f'{name}.xml'
-
-            testSuiteNode = ElementTree.Element('testsuite')
-
-            testSuiteNode.set('tests', str(suite.tests))
-            testSuiteNode.set('errors', str(suite.errors))
-            testSuiteNode.set('failures', str(suite.failures))
-            testSuiteNode.set('hostname', hostname)
-            testSuiteNode.set('name', name)
-            testSuiteNode.set('time', str(suite.time))
-            testSuiteNode.set('timestamp', timestamp)
-
-            propertiesNode = ElementTree.Element('properties')
-            testSuiteNode.append(propertiesNode)
-
-            for k, v in properties.items():
-                propertyNode = ElementTree.Element('property')
-                propertiesNode.append(propertyNode)
-
-                propertyNode.set('name', k)
-                propertyNode.set('value', v)
-
-            for testCase in suite.testCases:
-                testCaseNode = ElementTree.Element('testcase')
-                testSuiteNode.append(testCaseNode)
-
-                testCaseNode.set('classname', testCase.testClassName)
-                testCaseNode.set('name', testCase.testName)
-                testCaseNode.set('time', str(testCase.time))
-
-                if testCase.error:
-                    errorNode = ElementTree.Element('error')
-                    testCaseNode.append(errorNode)
-
-                    try:
-                        excType, excInstance, tb = testCase.error
-                        errorMessage = str(excInstance)
-                        stackTrace = ''.join(traceback.format_tb(tb))
-                    finally:  # Avoids a memory leak
-                        del tb
-
-                    errorNode.set('message', errorMessage.split('\n')[0])
-                    errorNode.set('type', str(excType))
-                    text = (errorMessage + '\n\n' + stackTrace)
-                    errorNode.text = text
-
-                if testCase.failure:
-
-                    failureNode = ElementTree.Element('failure')
-                    testCaseNode.append(failureNode)
-
-                    try:
-                        excType, excInstance, tb = testCase.failure
-                        errorMessage = str(excInstance)
-                        stackTrace = ''.join(traceback.format_tb(tb))
-                    except UnicodeEncodeError:
-                        errorMessage = 'Could not extract error str ' \
-                            'for unicode error'
-                        stackTrace = ''.join(traceback.format_tb(tb))
-                    finally:  # Avoids a memory leak
-                        del tb
-
-                    failureNode.set('message', errorMessage.split('\n')[0])
-                    failureNode.set('type', str(excType))
-                    text = f'{errorMessage}\n\n{stackTrace}'
-                    failureNode.text = text
-
-            # We don't have a good way to capture these yet, so they are empty:
-            systemOutNode = ElementTree.Element('system-out')
-            testSuiteNode.append(systemOutNode)
-            systemErrNode = ElementTree.Element('system-err')
-            testSuiteNode.append(systemErrNode)
-
-            # indent the XML structure
-            with suppress(AttributeError):
-                ElementTree.indent(testSuiteNode)
-            text = ElementTree.tostring(testSuiteNode).decode('utf-8')
-
-            # Write file
-            with open(filename, 'w') as outputFile:
-                outputFile.write(text)
+        start('properties', 1)
+        for k, v in self.properties.items():
+            start('property', 2, name=k, value=v)
+            end('property', 2, children=False)
+        end('properties', 1, children=bool(self.properties))
+
+        for testCase in suite.testCases:
+            start('testcase', 1, classname=testCase.testClassName,
+                  name=testCase.testName, time=str(testCase.time))
+            problems = [(tag, getattr(testCase, tag))
+                        for tag in ('error', 'failure')
+                        if getattr(testCase, tag)]
+            for tag, (excType, errorMessage, stackTrace) in problems:
+                start(tag, 2, message=errorMessage.split('\n')[0],
+                      type=excType)
+                xml.characters(f'{errorMessage}\n\n{stackTrace}')
+                end(tag, 2, children=False)
+            end('testcase', 1, children=bool(problems))
+
+        # We don't have a good way to capture these yet, so they are empty:
+        start('system-out', 1)
+        end('system-out', 1, children=False)
+        start('system-err', 1)
+        end('system-err', 1, children=False)
+        end('testsuite', 0)
+        xml.endDocument()
@@ -0,0 +1,233 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Journal of completed tests, to resume interrupted test runs.
+"""
+
+import json
+import os
+import traceback
+
+import zope.testrunner.feature
+from zope.testrunner.find import name_from_layer
+from zope.testrunner.formatter import parse_test
+
+
+class Journal:
+    """Append-only log of completed tests and layers.
+
+    Every record is a line of JSON which is written to disk before the
+    next test runs, so the journal survives the test run being killed.
+    Several processes may append to the same journal.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = os.open(path, os.O_RDWR | os.O_APPEND | os.O_CREAT,
+                          0o666)
+        if os.lseek(self.fd, 0, os.SEEK_END) > 0:
+            os.lseek(self.fd, -1, os.SEEK_END)
+            last = os.read(self.fd, 1)
+        else:
+            last = b'\n'
+        if last != b'\n':
+            # The last record is incomplete because the test run was
+            # killed while writing it.  Don't let it swallow the next one.
+            os.write(self.fd, b'\n')
+
+    def write(self, record):
+        line = json.dumps(record, sort_keys=True) + '\n'
+        # A single write, so that records of several processes do not
+        # get mixed up.
+        os.write(self.fd, line.encode('utf-8'))
+        os.fsync(self.fd)
+
+    def close(self):
+        os.close(self.fd)
+
+
+# The outcomes of the tests which are not run again when resuming
+DONE = ('success', 'skipped')
+
+
+def read_journal(path):
+    """Read the outcomes of tests and layers recorded in a journal.
+
+    Returns two dictionaries, mapping test ids to the last record of the
+    test and layer names to the last record of the layer.  A missing
+    journal is empty, and an incomplete last line (written when the test
+    run was killed) is ignored.
+    """
+    tests = {}
+    layers = {}
+    try:
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if 'test' in record:
+                    tests[record['test']] = record
+                elif 'layer' in record:
+                    layers[record['layer']] = record
+    except FileNotFoundError:
+        pass
+    return tests, layers
+
+
+def _test_record(test, outcome, **kw):
+    record = dict(kw, test=test.id(), name=str(test), outcome=outcome)
+    try:
+        record['xml'] = parse_test(test)
+    except TypeError:
+        pass
+    return record
+
+
+def _failure_record(test, outcome, seconds, exc_info):
+    return _test_record(
+        test, outcome, seconds=seconds, type=str(exc_info[0]),
+        message='%s\n\n%s' % (
+            exc_info[1], ''.join(traceback.format_tb(exc_info[2]))))
+
+
+class JournalOutputFormattingWrapper:
+    """Output formatter which delegates to another formatter for all
+    operations, but also records completed tests and layers in a journal.
+    """
+
+    def __init__(self, delegate, journal):
+        self.delegate = delegate
+        self.journal = journal
+        # The layer whose tests are being run
+        self.running_layer_name = None
+
+    def __getattr__(self, name):
+        return getattr(self.delegate, name)
+
+    def test_success(self, test, seconds):
+        self.journal.write(_test_record(test, 'success', seconds=seconds))
+        return self.delegate.test_success(test, seconds)
+
+    def test_skipped(self, test, reason):
+        self.journal.write(_test_record(test, 'skipped', reason=str(reason)))
+        return self.delegate.test_skipped(test, reason)
+
+    def test_failure(self, test, seconds, exc_info, **kw):
+        self.journal.write(
+            _failure_record(test, 'failure', seconds, exc_info))
+        return self.delegate.test_failure(test, seconds, exc_info, **kw)
+
+    def test_error(self, test, seconds, exc_info, **kw):
+        self.journal.write(_failure_record(test, 'error', seconds, exc_info))
+        return self.delegate.test_error(test, seconds, exc_info, **kw)
+
+    def summary(self, n_tests, n_failures, n_errors, n_seconds,
+                n_skipped=0):
+        if self.running_layer_name is not None:
+            self.journal.write(dict(
+                layer=self.running_layer_name, tests=n_tests,
+                failures=n_failures, errors=n_errors, skipped=n_skipped))
+        return self.delegate.summary(
+            n_tests, n_failures, n_errors, n_seconds, n_skipped)
+
+
+class ResumeJournal(zope.testrunner.feature.Feature):
+    """Record completed tests in a journal, and skip the tests which passed
+    (or were skipped) according to the journal of an interrupted test run.
+
+    Tests which failed are run again, and only their new outcome is
+    reported; the failures recorded in the journal are not.  The tests
+    which are not run again are counted and reported as if they were run
+    in this run.  Layers whose tests were all run without failures or
+    errors according to the journal are not run at all.
+    """
+
+    def __init__(self, runner):
+        super().__init__(runner)
+        options = runner.options
+        self.active = bool(options.journal or options.resume_journal)
+        self.journal = None
+        self.previous = {}
+        self.previous_layers = {}
+        if options.resume_journal:
+            # Read it before we write to it, it may be the same file.
+            self.previous, self.previous_layers = read_journal(
+                options.resume_journal)
+        if options.journal:
+            self.journal = Journal(options.journal)
+            self.output = options.output = JournalOutputFormattingWrapper(
+                options.output, self.journal)
+
+    def global_setup(self):
+        if not self.previous and not self.previous_layers:
+            return
+        done = []
+        self.n_done = 0
+        layers = self.runner.tests_by_layer_name
+        for name, suite in list(layers.items()):
+            n_tests = suite.countTestCases()
+            record = self.previous_layers.get(name)
+            if (record is not None and record['tests'] == n_tests
+                    and not record['failures'] and not record['errors']):
+                # All tests of the layer were run, we don't even need to
+                # set up the layer.
+                del layers[name]
+                self.n_done += n_tests
+                for test in suite:
+                    record = self.previous.get(test.id())
+                    if record is not None:
+                        done.append(record)
+                continue
+            tests = []
+            for test in suite:
+                record = self.previous.get(test.id())
+                if record is not None and record['outcome'] in DONE:
+                    done.append(record)
+                else:
+                    tests.append(test)
+            self.n_done += n_tests - len(tests)
+            if tests:
+                layers[name] = suite.__class__(tests)
+            else:
+                del layers[name]
+
+        if self.runner.options.resume_layer is not None:
+            # The parent process reports the earlier results.
+            return
+        self.runner.ran += self.n_done
+        output = self.runner.options.output
+        record_previous = getattr(output, 'record_previous', None)
+        for record in done:
+            if record['outcome'] == 'skipped':
+                self.runner.skipped.append(
+                    (record['name'], record['reason']))
+            elif 'xml' in record and record_previous is not None:
+                record_previous(record['xml'], record['seconds'])
+
+    def layer_setup(self, layer):
+        if self.journal is not None:
+            self.output.running_layer_name = name_from_layer(layer)
+
+    def global_teardown(self):
+        if self.journal is not None:
+            self.journal.close()
+
+    def report(self):
+        if (self.runner.options.resume_layer is not None
+                or not self.previous and not self.previous_layers):
+            return
+        self.runner.options.output.info(
+            "Skipped %d tests which passed or were skipped before the test"
+            " run was resumed." % self.n_done)
@@ -0,0 +1,186 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Stream of test run events as JSON lines.
+"""
+
+import json
+import os
+import time
+import traceback
+
+import zope.testrunner.feature
+from zope.testrunner.find import name_from_layer
+
+
+class JSONLinesOutputFormattingWrapper:
+    """Output formatter which delegates to another formatter for all
+    operations, but also writes every event as a line of JSON to a file.
+
+    Every line is written with a single unbuffered write to a file opened
+    for appending, so that it can be read while the tests are running and
+    that the events of tests run in subprocesses can be written to the
+    same file.
+    """
+
+    def __init__(self, delegate, fd):
+        self.delegate = delegate
+        self.fd = fd
+        self.pid = os.getpid()
+        # The layer whose tests are being run
+        self.running_layer_name = None
+
+    def __getattr__(self, name):
+        return getattr(self.delegate, name)
+
+    def close(self):
+        """Close the file.  Events are no longer written afterwards."""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+
+    def write(self, event, **record):
+        if self.fd is None:
+            return
+        record.update(event=event, pid=self.pid, time=time.time())
+        if self.running_layer_name is not None:
+            record.setdefault('layer', self.running_layer_name)
+        line = json.dumps(record, sort_keys=True, default=repr) + '\n'
+        os.write(self.fd, line.encode('utf-8'))
+
+    def info(self, message):
+        self.write('info', message=message)
+        return self.delegate.info(message)
+
+    def error(self, message):
+        self.write('error', message=message)
+        return self.delegate.error(message)
+
+    def error_with_banner(self, message):
+        self.write('error', message=message)
+        return self.delegate.error_with_banner(message)
+
+    def import_errors(self, import_errors):
+        for error in import_errors or ():
+            self.write('import_error', module=error.module,
+                       traceback=_format_exception(error.exc_info))
+        return self.delegate.import_errors(import_errors)
+
+    def start_set_up(self, layer_name):
+        self.write('start_set_up', layer=layer_name)
+        return self.delegate.start_set_up(layer_name)
+
+    def stop_set_up(self, seconds):
+        self.write('stop_set_up', seconds=seconds)
+        return self.delegate.stop_set_up(seconds)
+
+    def start_tear_down(self, layer_name):
+        self.write('start_tear_down', layer=layer_name)
+        return self.delegate.start_tear_down(layer_name)
+
+    def stop_tear_down(self, seconds):
+        self.write('stop_tear_down', seconds=seconds)
+        return self.delegate.stop_tear_down(seconds)
+
+    def tear_down_not_supported(self):
+        self.write('tear_down_not_supported')
+        return self.delegate.tear_down_not_supported()
+
+    def start_test(self, test, tests_run, total_tests):
+        self.write('start_test', test=test.id())
+        return self.delegate.start_test(test, tests_run, total_tests)
+
+    def test_success(self, test, seconds):
+        self.write('test_success', test=test.id(), seconds=seconds)
+        return self.delegate.test_success(test, seconds)
+
+    def test_skipped(self, test, reason):
+        self.write('test_skipped', test=test.id(), reason=str(reason))
+        return self.delegate.test_skipped(test, reason)
+
+    def test_failure(self, test, seconds, exc_info, **kw):
+        self.write('test_failure', test=test.id(), seconds=seconds,
+                   traceback=_format_exception(exc_info), **kw)
+        return self.delegate.test_failure(test, seconds, exc_info, **kw)
+
+    def test_error(self, test, seconds, exc_info, **kw):
+        self.write('test_error', test=test.id(), seconds=seconds,
+                   traceback=_format_exception(exc_info), **kw)
+        return self.delegate.test_error(test, seconds, exc_info, **kw)
+
+    def stop_test(self, test, gccount):
+        self.write('stop_test', test=test.id(), gccount=gccount)
+        return self.delegate.stop_test(test, gccount)
+
+    def test_garbage(self, test, garbage):
+        self.write('test_garbage', test=test.id(), garbage=len(garbage))
+        return self.delegate.test_garbage(test, garbage)
+
+    def test_threads(self, test, new_threads):
+        self.write('test_threads', test=test.id(),
+                   threads=[str(thread) for thread in new_threads])
+        return self.delegate.test_threads(test, new_threads)
+
+    def garbage(self, garbage):
+        self.write('garbage', garbage=len(garbage))
+        return self.delegate.garbage(garbage)
+
+    def summary(self, n_tests, n_failures, n_errors, n_seconds,
+                n_skipped=0):
+        self.write('summary', tests=n_tests, failures=n_failures,
+                   errors=n_errors, skipped=n_skipped, seconds=n_seconds)
+        return self.delegate.summary(
+            n_tests, n_failures, n_errors, n_seconds, n_skipped)
+
+    def totals(self, n_tests, n_failures, n_errors, n_seconds,
+               n_skipped=0):
+        self.write('totals', tests=n_tests, failures=n_failures,
+                   errors=n_errors, skipped=n_skipped, seconds=n_seconds)
+        return self.delegate.totals(
+            n_tests, n_failures, n_errors, n_seconds, n_skipped)
+
+
+def _format_exception(exc_info):
+    return ''.join(traceback.format_exception(*exc_info))
+
+
+class JSONLines(zope.testrunner.feature.Feature):
+    """Write the events of the test run to a file as JSON lines.
+
+    Tests run in subprocesses append their events to the file of the
+    parent process, so the file has the events of the whole test run.
+    """
+
+    def __init__(self, runner):
+        super().__init__(runner)
+        options = runner.options
+        self.active = bool(options.jsonl)
+        if not self.active:
+            return
+        flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT
+        if options.resume_layer is None:
+            flags |= os.O_TRUNC
+        fd = os.open(options.jsonl, flags, 0o666)
+        self.output = options.output = JSONLinesOutputFormattingWrapper(
+            options.output, fd)
+
+    def layer_setup(self, layer):
+        self.output.running_layer_name = name_from_layer(layer)
+
+    def global_teardown(self):
+        if not self.runner.show_report:
+            self.output.close()
+
+    def report(self):
+        # Events of features which report later are not written.
+        self.output.close()
@@ -20,6 +20,7 @@ import re
 import sys
 from importlib.metadata import distribution
 
+from zope.testrunner.compression import available_methods
 from zope.testrunner.formatter import ColorfulOutputFormatter
 from zope.testrunner.formatter import OutputFormatter
 from zope.testrunner.formatter import SubunitOutputFormatter
@@ -34,6 +35,48 @@ def _regex_search(s):
     return re.compile(s).search
 
 
+def _shard(s):
+    """Parse the argument of --shard.
+
+    >>> _shard('2/3')
+    (2, 3)
+    >>> _shard('4/3')  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    argparse.ArgumentTypeError: invalid shard '4/3', expected I/N with ...
+    """
+    index, sep, n_shards = s.partition('/')
+    try:
+        index, n_shards = int(index), int(n_shards)
+    except ValueError:
+        index = n_shards = 0
+    if not 1 <= index <= n_shards:
+        raise argparse.ArgumentTypeError(
+            f'invalid shard {s!r}, expected I/N with 1 <= I <= N')
+    return index, n_shards
+
+
+def _gc_mode(s):
+    """Parse the argument of --gc-mode.
+
+    >>> _gc_mode('gen0')
+    ('gen0', None)
+    >>> _gc_mode('sample:100')
+    ('sample', 100)
+    >>> _gc_mode('sample:0')  # doctest: +ELLIPSIS
+    Traceback (most recent call last):
+    ...
+    argparse.ArgumentTypeError: invalid mode 'sample:0', expected full, ...
+    """
+    mode, sep, n = s.partition(':')
+    if mode in ('full', 'gen0') and not sep:
+        return mode, None
+    if mode == 'sample' and n.isdigit() and int(n) > 0:
+        return mode, int(n)
+    raise argparse.ArgumentTypeError(
+        f'invalid mode {s!r}, expected full, gen0 or sample:N with N > 0')
+
+
 parser = argparse.ArgumentParser(
     description="Discover and run unittest tests")
 
@@ -99,6 +142,22 @@ Tests matching any of the test filters are included.  If no test
 filter is specified, then all tests are run.
 """)
 
+searching.add_argument(
+    '--tests-from-file', action="store", dest='tests_from_file',
+    metavar='PATH',
+    help="""\
+Run only the tests whose ids are listed in the given file, one id per
+line.  Use "-" to read the ids from standard input.  An id must match
+exactly, either the test id (for example "pkg.tests.TestFoo.test_bar")
+or the test name as shown by --list-tests.  This is much faster than
+giving a large number of --test options, and it can be combined with
+all other filters.
+
+If all listed ids are dotted names, test modules which cannot contain
+any of them (because their dotted name is not a prefix of a listed id)
+are not even imported.
+""")
+
 searching.add_argument(
     '--unit', '-u', action="store_true", dest='unit',
     help="""\
@@ -148,6 +207,17 @@ Default is None, which means the level is not restricted by this option.
 If this option is used it overrides `--at-level` and `--all` options.
 """)
 
+searching.add_argument(
+    '--shard', action="store", dest='shard', metavar='I/N', type=_shard,
+    help="""\
+Partition the selected tests into N shards of about the same duration and
+run only the I-th of them (counting from 1).  Running all N shards, for
+example in separate CI jobs, runs all tests.  Layers are kept whole when
+that is cheap, otherwise their tests are spread over several shards.  The
+partition is deterministic; it is balanced using the durations recorded
+with --timings, if available, and by the number of tests otherwise.
+""")
+
 searching.add_argument(
     '--list-tests', action="store_true", dest='list_tests',
     default=False,
@@ -205,6 +275,54 @@ reporting.add_argument(
 Output progress status, but only when stdout is a terminal.
 """)
 
+reporting.add_argument(
+    '--progress-rate', action="store", type=float, dest='progress_rate',
+    default=10, metavar='HZ',
+    help="""\
+Update the progress status at most this many times per second (default:
+10), so that writing it does not slow down running fast tests.  The status
+of the last test of a layer, of tests which fail and of tests after which
+--gc-after-test reports collected garbage are always written.  Use 0 to
+update it for every test.
+""")
+
+reporting.add_argument(
+    '--flush-interval', action="store", type=float, dest='flush_interval',
+    default=0.2, metavar='SECONDS',
+    help="""\
+Flush the output after a test only if it was not flushed in this many
+seconds (default: 0.2), so that many fast tests do not each pay for
+writing their output.  The output is always flushed before a layer is set
+up or torn down, after a failure or error is reported and, if the names of
+the tests are shown, before a test is run.  Tests run in parallel
+subprocesses report their activity to the parent process at most this
+often, too.  Use 0 to flush the output after every test.
+""")
+
+reporting.add_argument(
+    '--dashboard', action="store_true", dest='dashboard',
+    help="""\
+When running layers in parallel subprocesses (-j), show what each of them
+is doing: the layer it runs, the number of tests it started and for how
+long it has been running, and how many layers are done.  If durations
+were recorded with --timings, the time left is estimated, too.  On a
+terminal, this status is updated in place, as often as --progress-rate
+allows; otherwise a line is written whenever a subprocess starts or
+finishes a layer.
+""")
+
+reporting.add_argument(
+    '--deduplicate-tracebacks', action="store_true",
+    dest='deduplicate_tracebacks',
+    help="""\
+Print the traceback of a failing test only if no earlier test failed with
+the same exception and message at the same code locations.  Otherwise,
+the test it is the same as and how often it was seen are printed instead.
+This helps when a broken fixture makes many tests fail in the same way.
+Tests run in subprocesses (with -j or for layers which cannot be torn
+down) are only compared with the tests run in the same subprocess.
+""")
+
 reporting.add_argument(
     '--color', '-c', action="store_true", dest='color',
     help="""\
@@ -309,6 +427,50 @@ reporting.add_argument(
 If given, XML reports will be written to the specified directory.
 """)
 
+reporting.add_argument(
+    '--compress-reports', action="store", dest='compress_reports',
+    choices=['gzip', 'zstd'], metavar='METHOD',
+    help="""\
+Compress the reports while they are written, with gzip or zstd.  zstd
+requires Python 3.14 or the zstandard package.  With --xml, the reports
+are written to a compressed tar archive of the testreports directory
+(testreports.tar.gz or testreports.tar.zst).  It is named with a .part
+suffix until the test run is complete; if the test run is killed, it can
+be read up to the last report flushed (see --flush-interval).  With
+--subunit or --subunit-v2, the subunit stream written to stdout is
+compressed.
+""")
+
+reporting.add_argument(
+    '--journal', action="store", dest='journal', metavar='PATH',
+    help="""\
+Append the outcome of every test, and every layer whose tests were run, to
+the given file as soon as they are known.  If the test run is interrupted,
+it can be resumed with --resume-journal.
+""")
+
+reporting.add_argument(
+    '--resume-journal', action="store", dest='resume_journal',
+    metavar='PATH',
+    help="""\
+Skip the tests which passed or were skipped according to the given
+journal (see --journal), and count them as if they were run in this test
+run.  Layers whose tests were all run without failures or errors are not
+set up at all.  Tests which failed are run again, and only their new
+outcome is reported, not the failures recorded in the journal.  The same
+file may be given to --journal, so that the test run can be interrupted
+and resumed repeatedly.
+""")
+
+reporting.add_argument(
+    '--jsonl', action="store", dest='jsonl', metavar='PATH',
+    help="""\
+Write every event of the test run (layers being set up and torn down,
+tests being started and their outcomes, summaries and problems found) to
+the given file as a line of JSON as soon as it happens, in addition to the
+normal output.  Tests run in subprocesses write to the same file.
+""")
+
 
 ######################################################################
 # Analysis
@@ -363,13 +525,28 @@ if uses_refcounts:
     On verbosity level 4 or higher output detailed cycle information.
     """)
 
+    analysis.add_argument(
+        '--gc-mode', action="store", dest='gc_mode', type=_gc_mode,
+        metavar='MODE',
+        help="""\
+    How to collect garbage after each test; implies --gc-after-test.
+    A full collection (full, the default) after every test can be slow for
+    large test runs.  With gen0 only the youngest generation is collected.
+    With sample:N the youngest generation is collected after each test,
+    and a full collection is done every N tests (and at the end of every
+    layer); if it finds garbage, the tests run since the previous full
+    collection are reported.  Run them with --gc-after-test to find the
+    one to blame.
+    """)
+
 analysis.add_argument(
     '--repeat', '-N', action="store", type=int, dest='repeat',
     default=1,
     help="""\
 Repeat the tests the given number of times.  This option is used to
 make sure that tests leave their environment in the state they found
-it and, with the --report-refcounts option to look for memory leaks.
+it and, with the --report-refcounts or --report-leaks options to look for
+memory leaks.
 """)
 
 analysis.add_argument(
@@ -380,6 +557,51 @@ refcounts by object type.  This option that requires that Python was
 built with the --with-pydebug option to configure.
 """)
 
+analysis.add_argument(
+    '--report-leaks', action="store_true", dest='report_leaks',
+    help="""\
+After each run of the tests, output a report summarizing changes in the
+number of objects tracked by the garbage collector.  With -v, the changes
+are shown by object type and, if tracemalloc is tracing (e.g. with
+PYTHONTRACEMALLOC=1), the memory allocated by each source line is shown,
+too.  Unlike --report-refcounts, this works with any build of Python.
+""")
+
+analysis.add_argument(
+    '--track-package', action="append", dest='track_packages',
+    metavar='PACKAGE',
+    help="""\
+With --report-refcounts and --report-leaks, only count the instances of
+types defined in the given package (or module).  This makes the reports
+shorter and faster to compute.  This option can be used multiple times.
+""")
+
+analysis.add_argument(
+    '--timings', action="store", dest='timings', metavar='PATH',
+    help="""\
+Record the durations of tests and layers in the given file.  The
+durations from earlier runs are used to balance --shard and
+--optimize-layer-order, and --report-layers compares with them.
+""")
+
+analysis.add_argument(
+    '--report-layers', action="store", dest='report_layers', type=int,
+    metavar='N',
+    help="""\
+After running the tests, report the N layers which took the most time to
+set up, tear down and run the tests of, and, with --timings, how that
+changed since the last run.
+""")
+
+analysis.add_argument(
+    '--release-tests', action="store_true", dest='release_tests',
+    help="""\
+Drop all references the test runner holds to a test once it has run, so
+that the memory it uses can be freed before the rest of its layer is run.
+Tests that failed are then only remembered by their names and formatted
+tracebacks.  With --repeat, tests are only dropped in the last repetition.
+""")
+
 analysis.add_argument(
     '--coverage', action="store", dest='coverage',
     help="""\
@@ -500,6 +722,24 @@ setup.add_argument(
 Specifies the name of a directory to ignore when looking for tests.
 """)
 
+setup.add_argument(
+    '--optimize-layer-order', action="store_true",
+    dest='optimize_layer_order',
+    help="""\
+Order the layers so that as little time as possible is spent setting up
+layers again after they were torn down.  The layer set up durations
+recorded with --timings are used if available; otherwise the number of
+layer set ups is minimized.
+""")
+
+setup.add_argument(
+    '--concurrent-setup', action="store_true", dest='concurrent_setup',
+    help="""\
+Set up layers which define a true ``threadSafeSetUp`` attribute (it is
+not inherited by sub-layers) in threads of their own, concurrently with
+the set up of other such layers they do not depend on.
+""")
+
 setup.add_argument(
     '--shuffle', action="store_true", dest='shuffle',
     help="""\
@@ -633,6 +873,14 @@ def get_options(args=None, defaults=None):
             return options
         options.buffer = True
 
+    if (options.compress_reports
+            and options.compress_reports not in available_methods()):
+        print("""\
+        Compressing with %s requires Python 3.14 or the zstandard package.
+        """ % options.compress_reports)
+        options.fail = True
+        return options
+
     if options.subunit and options.subunit_v2:
         print("""\
         You may only use one of --subunit and --subunit-v2.
@@ -652,6 +900,18 @@ def get_options(args=None, defaults=None):
 
     options.fail = False
 
+    if options.tests_from_file:
+        try:
+            options.test_ids = read_test_ids(options.tests_from_file)
+        except OSError as e:
+            print("""\
+        Could not read test ids from %s: %s
+        """ % (options.tests_from_file, e))
+            options.fail = True
+            return options
+    else:
+        options.test_ids = None
+
     if options.legacy_module_filter:
         module_filter = options.legacy_module_filter
         if module_filter != '.':
@@ -726,6 +986,15 @@ def get_options(args=None, defaults=None):
         options.fail = True
         return options
 
+    if options.report_leaks and options.repeat < 2:
+        print("""\
+        You must use the --repeat (-N) option to specify a repeat
+        count greater than 1 when using the --report-leaks
+        option.
+        """)
+        options.fail = True
+        return options
+
     if options.report_refcounts and not hasattr(sys, "gettotalrefcount"):
         print("""\
         The Python you are running was not configured
@@ -791,3 +1060,25 @@ def normalize_package(package, package_map=None):
                 bits = [pkg] + bits
             return '.'.join(bits)
     return package.replace('/', '.')
+
+
+def read_test_ids(path):
+    """Read the test ids given to --tests-from-file.
+
+    The ids are read one per line from *path*, or from standard input if
+    *path* is "-".  Blank lines are ignored.
+
+        >>> import tempfile
+        >>> with tempfile.NamedTemporaryFile('w', delete=False) as f:
+        ...     _ = f.write('pkg.tests.TestFoo.test_bar\\n\\n pkg.test_baz\\n')
+        >>> sorted(read_test_ids(f.name))
+        ['pkg.test_baz', 'pkg.tests.TestFoo.test_bar']
+        >>> os.unlink(f.name)
+
+    """
+    if path == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(path) as f:
+            lines = f.read().splitlines()
+    return frozenset(line.strip() for line in lines if line.strip())
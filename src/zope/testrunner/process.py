@@ -17,6 +17,7 @@
 import sys
 
 import zope.testrunner.feature
+import zope.testrunner.timings
 
 
 class SubProcess(zope.testrunner.feature.Feature):
@@ -49,4 +50,9 @@ class SubProcess(zope.testrunner.feature.Feature):
         for test, exc_info in self.runner.errors:
             print(' '.join(str(test).strip().split('\n')),
                   file=self.original_stderr)
+        if self.runner.timings is not None:
+            zope.testrunner.timings.report_to_parent(
+                self.runner.timings, self.original_stderr)
+        if self.runner.options.xmlOutput:
+            self.runner.options.output.report_to_parent(self.original_stderr)
         self.original_stderr.flush()
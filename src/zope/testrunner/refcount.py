@@ -16,13 +16,19 @@
 
 import gc
 import sys
-import types
+import tracemalloc
+from collections import Counter
 
 
 class TrackRefs:
-    """Object to track reference counts across test runs."""
+    """Object to track reference counts across test runs.
 
-    def __init__(self):
+    If *packages* is given, only the instances of types defined in these
+    packages (or modules) are tracked.
+    """
+
+    def __init__(self, packages=None):
+        self.packages = packages
         self.type2count = {}
         self.type2all = {}
         self.delta = None
@@ -33,27 +39,21 @@ class TrackRefs:
     def update(self):
         gc.collect()
         obs = sys.getobjects(0)
-        type2count = {}
-        type2all = {}
-        n = 0
-        for o in obs:
-            if type(o) is str and o == '<dummy key>':
-                # avoid dictionary madness
-                continue
-
-            all = sys.getrefcount(o) - 3
-            n += all
+        type2count = count_types(obs, self.packages)
 
+        # Summing up the reference counts needs a function call per
+        # object, only do it for the types we track.
+        type2all = dict.fromkeys(type2count, 0)
+        getrefcount = sys.getrefcount
+        for o in obs:
             t = type(o)
-            if issubclass(t, types.InstanceType):
-                t = o.__class__
-
-            if t in type2count:
-                type2count[t] += 1
-                type2all[t] += all
-            else:
-                type2count[t] = 1
-                type2all[t] = all
+            if t in type2all:
+                type2all[t] += getrefcount(o)
+        for t, count in type2count.items():
+            # don't count the references from ``obs``, ``o`` and
+            # the argument of ``getrefcount``
+            type2all[t] -= 3 * count
+        n = sum(type2all.values())
 
         ct = [(
             type_or_class_title(t),
@@ -98,6 +98,102 @@ class TrackRefs:
         self.delta = None
 
 
+class TrackObjects:
+    """Object to track the number of live objects across test runs.
+
+    Unlike ``TrackRefs``, this works with any build of Python, but only
+    sees the objects tracked by the garbage collector.  If ``tracemalloc``
+    is tracing, the memory allocated by each source line is tracked, too.
+
+    If *packages* is given, only the instances of types defined in these
+    packages (or modules) are tracked.
+    """
+
+    def __init__(self, packages=None):
+        self.packages = packages
+        self.type2count = {}
+        self.delta = None
+        self.n = 0
+        self.change = 0
+        self.snapshot = None
+        self.memory_delta = None
+        self.update()
+        self.delta = None
+
+    def update(self):
+        # don't count the results of the last update
+        self.delta = self.memory_delta = None
+        gc.collect()
+        type2count = count_types(gc.get_objects(), self.packages)
+        n = sum(type2count.values())
+
+        ct = [(type_or_class_title(t), count - self.type2count.get(t, 0))
+              for t, count in type2count.items()]
+        ct += [(type_or_class_title(t), - self.type2count[t])
+               for t in self.type2count
+               if t not in type2count]
+        ct.sort()
+        self.delta = ct
+        self.type2count = type2count
+        self.change = n - self.n
+        self.n = n
+
+        if tracemalloc.is_tracing():
+            snapshot = tracemalloc.take_snapshot().filter_traces((
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ))
+            if self.snapshot is not None:
+                stats = snapshot.compare_to(self.snapshot, 'lineno')
+                self.memory_delta = [
+                    stat for stat in stats[:10] if stat.size_diff]
+            self.snapshot = snapshot
+
+    def output(self):
+        printed = False
+        s1 = 0
+        for t, delta1 in self.delta:
+            if delta1:
+                if not printed:
+                    print('    Leak details, changes in instances'
+                          ' by type/class:')
+                    print("    %-55s %6s" % ('type/class', 'insts'))
+                    print("    %-55s %6s" % ('-' * 55, '-----'))
+                    printed = True
+                print("    %-55s %6d" % (t, delta1))
+                s1 += delta1
+
+        if printed:
+            print("    %-55s %6s" % ('-' * 55, '-----'))
+            print("    %-55s %6s" % ('total', s1))
+
+        if self.memory_delta:
+            print('    Memory allocated by source line:')
+            for stat in self.memory_delta:
+                print("    %s" % stat)
+
+        self.delta = self.memory_delta = None
+
+
+def count_types(objects, packages=None):
+    """Count *objects* by type.
+
+    If *packages* is given, only count the instances of types defined in
+    these packages (or modules).
+    """
+    type2count = Counter(map(type, objects))
+    if packages:
+        prefixes = tuple(p + '.' for p in packages)
+        packages = set(packages)
+        for t in list(type2count):
+            module = getattr(t, '__module__', None)
+            if not isinstance(module, str) or (
+                    module not in packages
+                    and not module.startswith(prefixes)):
+                del type2count[t]
+    return type2count
+
+
 def type_or_class_title(t):
     module = getattr(t, '__module__', '__builtin__')
     if module == '__builtin__':
@@ -22,30 +22,38 @@ import queue
 import re
 import subprocess
 import sys
+import tempfile
 import threading
 import time
 import traceback
 import unittest
 import warnings
+from collections import Counter
 from contextlib import contextmanager
 from io import StringIO
 from pathlib import Path
 
 import zope.testrunner
 import zope.testrunner._doctest
+import zope.testrunner.compression
 import zope.testrunner.coverage
+import zope.testrunner.dashboard
 import zope.testrunner.debug
 import zope.testrunner.filter
 import zope.testrunner.garbagecollection
 import zope.testrunner.interfaces
+import zope.testrunner.journal
+import zope.testrunner.jsonl
 import zope.testrunner.listing
 import zope.testrunner.logsupport
 import zope.testrunner.process
 import zope.testrunner.profiling
 import zope.testrunner.selftest
+import zope.testrunner.shard
 import zope.testrunner.shuffle
 import zope.testrunner.statistics
 import zope.testrunner.tb_format
+import zope.testrunner.timings
 from zope.testrunner import threadsupport
 from zope.testrunner.find import _layer_name_cache
 from zope.testrunner.find import import_name
@@ -55,9 +63,10 @@ from zope.testrunner.layer import EmptyLayer
 from zope.testrunner.layer import EmptySuite
 from zope.testrunner.layer import UnitTests
 from zope.testrunner.options import get_options
+from zope.testrunner.refcount import TrackObjects
 from zope.testrunner.refcount import TrackRefs
 
-from .digraph import DiGraph
+from .digraph import ArrayDiGraph
 from .util import is_jython
 from .util import uses_refcounts
 
@@ -142,6 +151,9 @@ class Runner:
 
         self.tests_by_layer_name = {}
 
+        # Set by the RecordTimings feature
+        self.timings = None
+
     def ordered_layers(self):
         if (self.options.processes > 1 and not self.options.resume_layer):
             # if we want multiple processes, we need a fake layer as first
@@ -151,10 +163,53 @@ class Runner:
 
         layer_names = {layer_from_name(layer_name): layer_name
                        for layer_name in self.tests_by_layer_name}
-        for layer in order_by_bases(layer_names):
+        graph = layer_graph(self.options)
+        if self.options.optimize_layer_order:
+            layers = order_by_cost(
+                layer_names, self.layer_setup_cost(), graph)
+        else:
+            layers = order_by_bases(layer_names, graph)
+        for layer in layers:
             layer_name = layer_names[layer]
             yield layer_name, layer, self.tests_by_layer_name[layer_name]
 
+    def layer_setup_cost(self):
+        """Return a function estimating how long it takes to set up a layer.
+
+        The durations recorded with --timings are used.  Layers without a
+        recorded duration are assumed to take the mean of the recorded
+        durations, or a second if nothing was recorded.
+        """
+        timings = zope.testrunner.timings.Timings(self.options.timings)
+        durations = timings.layers
+        if durations:
+            default = sum(durations.values()) / len(durations)
+        else:
+            default = 1.0
+
+        def setup_cost(layer):
+            return durations.get(name_from_layer(layer), default)
+
+        return setup_cost
+
+    def report_layer_order(self):
+        """Report what --optimize-layer-order saves over the default order."""
+        layers = [layer_from_name(layer_name)
+                  for layer_name in self.tests_by_layer_name]
+        setup_cost = self.layer_setup_cost()
+        graph = layer_graph(self.options)
+        default = layer_set_ups(order_by_bases(layers, graph), graph)
+        optimized = layer_set_ups(
+            order_by_cost(layers, setup_cost, graph), graph)
+        msg = "Optimized layer order avoids %d of %d layer set ups" % (
+            len(default) - len(optimized), len(default))
+        if self.options.timings:
+            saved = (sum(setup_cost(layer) for layer in default)
+                     - sum(setup_cost(layer) for layer in optimized))
+            msg += ", saving about %s" % (
+                self.options.output.format_seconds(saved))
+        self.options.output.info(msg + ".")
+
     def register_tests(self, tests):
         """Registers tests."""
         # XXX To support multiple features that find tests this shouldn't be
@@ -190,6 +245,11 @@ class Runner:
             try:
                 if self.do_run_tests:
                     self.run_tests()
+            except BaseException:
+                # There is no report, so the features finish their output
+                # in the teardown.
+                self.show_report = False
+                raise
             finally:
                 # Early teardown
                 for feature in reversed(self.features):
@@ -202,7 +262,7 @@ class Runner:
                 for feature in self.features:
                     feature.report()
 
-        if self.options.xmlOutput:
+        if self.options.xmlOutput and self.options.resume_layer is None:
             self.options.output.writeXMLReports()
 
     def configure(self):
@@ -230,10 +290,16 @@ class Runner:
         options.resume_number = resume_number
 
         if options.xmlOutput:
-            folder = Path(options.xmlOutput).resolve()
-            folder.mkdir(parents=True, exist_ok=True)
+            if resume_layer is None:
+                folder = Path(options.xmlOutput).resolve()
+                folder.mkdir(parents=True, exist_ok=True)
+            else:
+                # The parent process writes the reports.
+                folder = None
             options.output = XMLOutputFormattingWrapper(
-                options.output, folder=folder)
+                options.output, folder=folder,
+                compress=options.compress_reports,
+                flush_interval=options.flush_interval)
 
         self.options = options
 
@@ -251,14 +317,21 @@ class Runner:
             self.features.append(
                 zope.testrunner.garbagecollection.Debug(self))
 
+        self.features.append(zope.testrunner.timings.RecordTimings(self))
         self.features.append(zope.testrunner.find.Find(self))
+        self.features.append(zope.testrunner.shard.Shard(self))
         self.features.append(zope.testrunner.shuffle.Shuffle(self))
         self.features.append(zope.testrunner.process.SubProcess(self))
         self.features.append(zope.testrunner.filter.Filter(self))
+        # Only count the tests of the selected layers as done.
+        self.features.append(zope.testrunner.journal.ResumeJournal(self))
         self.features.append(zope.testrunner.listing.Listing(self))
         self.features.append(
             zope.testrunner.statistics.Statistics(self))
         self.features.append(zope.testrunner.tb_format.Traceback(self))
+        self.features.append(zope.testrunner.jsonl.JSONLines(self))
+        self.features.append(
+            zope.testrunner.compression.CompressSubunit(self))
 
         # Remove all features that aren't activated
         self.features = [f for f in self.features if f.active]
@@ -291,8 +364,15 @@ class Runner:
 
         """
         setup_layers = {}
+        if (self.options.optimize_layer_order
+                and self.options.resume_layer is None):
+            self.report_layer_order()
         layers_to_run = list(self.ordered_layers())
         should_resume = False
+        if self.options.xmlOutput and self.options.resume_layer is None:
+            for layer_name, layer, tests in layers_to_run:
+                self.options.output.expect_tests(
+                    tests, self.options.repeat or 1)
 
         while layers_to_run:
             layer_name, layer, tests = layers_to_run[0]
@@ -320,10 +400,11 @@ class Runner:
 
         if should_resume:
             if layers_to_run:
-                self.ran += resume_tests(
-                    self.script_parts, self.options, self.features,
-                    layers_to_run, self.failures, self.errors,
-                    self.skipped, self.cwd)
+                with test_ids_for_subprocesses(self.options):
+                    self.ran += resume_tests(
+                        self.script_parts, self.options, self.features,
+                        layers_to_run, self.failures, self.errors,
+                        self.skipped, self.cwd)
 
         if setup_layers:
             if self.options.resume_layer is None:
@@ -361,9 +442,12 @@ def run_tests(options, tests, name, failures, errors, skipped, import_errors):
     if options.report_refcounts:
         if options.verbose:
             # XXX This code path is untested
-            track = TrackRefs()
+            track = TrackRefs(options.track_packages)
         rc = sys.gettotalrefcount()
 
+    if options.report_leaks:
+        track_objects = TrackObjects(options.track_packages)
+
     for iteration in repeat_range:
         if repeat > 1:
             output.info("Iteration %d" % (iteration + 1))
@@ -371,12 +455,15 @@ def run_tests(options, tests, name, failures, errors, skipped, import_errors):
         if options.verbose > 0 or options.progress:
             output.info('  Running:')
         result = TestResult(options, tests, layer_name=name)
+        # Tests which won't be run again can be dropped from their suite
+        # as soon as they are done.
+        release = options.release_tests and iteration == repeat - 1
 
         t = time.time()
 
         if options.post_mortem:
             # post-mortem debugging
-            for test in tests:
+            for index, test in enumerate(tests):
                 if result.shouldStop:
                     break
                 expecting_failure = (
@@ -387,7 +474,6 @@ def run_tests(options, tests, name, failures, errors, skipped, import_errors):
                         False)
                 )
                 result.startTest(test)
-                state = test.__dict__.copy()
                 try:
                     try:
                         test.debug()
@@ -411,18 +497,18 @@ def run_tests(options, tests, name, failures, errors, skipped, import_errors):
                             result.addSuccess(test)
                 finally:
                     result.stopTest(test)
-                test.__dict__.clear()
-                test.__dict__.update(state)
+                if release:
+                    tests._removeTestAtIndex(index)
 
         else:
             # normal
-            for test in tests:
+            for index, test in enumerate(tests):
                 if result.shouldStop:
                     break
-                state = test.__dict__.copy()
+                # The result restores the state of the test in stopTest.
                 test(result)
-                test.__dict__.clear()
-                test.__dict__.update(state)
+                if release:
+                    tests._removeTestAtIndex(index)
 
         t = time.time() - t
         output.stop_tests()
@@ -467,6 +553,11 @@ def run_tests(options, tests, name, failures, errors, skipped, import_errors):
             elif iteration > 0:
                 output.refcounts(rc, prev)
 
+        if options.report_leaks:
+            track_objects.update()
+            if iteration > 0:
+                output.leaks(track_objects)
+
     return ran
 
 
@@ -474,9 +565,7 @@ def run_layer(options, layer_name, layer, tests, setup_layers,
               failures, errors, skipped, import_errors):
 
     output = options.output
-    gathered = []
-    gather_layers(layer, gathered)
-    needed = {ly: 1 for ly in gathered}
+    needed = layer_graph(options).needed(layer)
     if options.resume_number != 0:
         output.info("Running %s tests:" % layer_name)
     tear_down_unneeded(options, needed, setup_layers, errors)
@@ -544,6 +633,10 @@ def spawn_layer_in_subprocess(result, script_parts, options, features,
             args.extend(['--default', d])
 
         args.extend(options.original_testrunner_args[1:])
+        if options.tests_from_file:
+            # May differ from the original argument, see
+            # test_ids_for_subprocesses.
+            args.extend(['--tests-from-file', options.tests_from_file])
 
         debugargs = args  # save them before messing up for windows
         if sys.platform.startswith('win'):
@@ -554,6 +647,7 @@ def spawn_layer_in_subprocess(result, script_parts, options, features,
         for feature in features:
             feature.layer_setup(layer)
 
+        result.start_time = time.monotonic()
         child = subprocess.Popen(
             args, shell=False, stdin=subprocess.PIPE,
             stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=cwd,
@@ -641,6 +735,12 @@ def spawn_layer_in_subprocess(result, script_parts, options, features,
             next_err = next(erriter)
             errors.append((next_err.strip().decode(), None))
 
+        for line in erriter:
+            if line.startswith(b'timings '):
+                zope.testrunner.timings.merge_from_subprocess(features, line)
+            elif line.startswith(b'xml '):
+                output.merge_from_subprocess(line)
+
     finally:
         result.done = True
         if child is not None:
@@ -677,6 +777,9 @@ class AbstractSubprocessResult:
 
     num_ran = 0
     done = False
+    # When the subprocess was started, and how many tests it started
+    start_time = None
+    tests_started = 0
 
     def __init__(self, layer_name, queue):
         self.layer_name = layer_name
@@ -711,6 +814,16 @@ class ImmediateSubprocessResult(AbstractSubprocessResult):
 _is_dots = re.compile(br'\.+(\r\n?|\n)').match  # Windows sneaks in a \r\n.
 
 
+class DashboardSubprocessResult(AbstractSubprocessResult):
+    "Keeps stdout for later processing; counts the tests for the dashboard."
+
+    def write(self, out):
+        if _is_dots(out):
+            self.tests_started += len(out.strip())
+        else:
+            self.stdout.append(out)
+
+
 class KeepaliveSubprocessResult(AbstractSubprocessResult):
     "Keeps stdout for later processing; sends marks to queue to show activity."
 
@@ -729,12 +842,37 @@ class KeepaliveSubprocessResult(AbstractSubprocessResult):
             self.stdout.append(out)
 
 
+@contextmanager
+def test_ids_for_subprocesses(options):
+    """Make test ids read from standard input available to subprocesses.
+
+    The subprocesses cannot read our standard input, so we hand them the
+    ids in a temporary file instead.
+    """
+    if options.tests_from_file != '-':
+        yield
+        return
+    fd, path = tempfile.mkstemp(prefix='zope.testrunner-', suffix='.txt')
+    with os.fdopen(fd, 'w') as f:
+        f.writelines(test_id + '\n' for test_id in sorted(options.test_ids))
+    options.tests_from_file = path
+    try:
+        yield
+    finally:
+        options.tests_from_file = '-'
+        os.unlink(path)
+
+
 def resume_tests(script_parts, options, features, layers, failures, errors,
                  skipped, cwd=None):
     results = []
     stdout_queue = None
+    dashboard = None
     if options.processes == 1:
         result_factory = ImmediateSubprocessResult
+    elif (options.dashboard and
+            not options.subunit and not options.subunit_v2):
+        result_factory = DashboardSubprocessResult
     elif (options.verbose > 1 and
             not options.subunit and not options.subunit_v2):
         result_factory = KeepaliveSubprocessResult
@@ -760,6 +898,9 @@ def resume_tests(script_parts, options, features, layers, failures, errors,
     output = None
     # Get an object that (only) accepts bytes
     stdout = _get_output_buffer(sys.stdout)
+    if result_factory is DashboardSubprocessResult:
+        dashboard = zope.testrunner.dashboard.Dashboard(
+            options, layers, stdout)
     while ready_threads or running_threads:
         while len(running_threads) < options.processes and ready_threads:
             thread = ready_threads.pop(0)
@@ -790,10 +931,14 @@ def resume_tests(script_parts, options, features, layers, failures, errors,
             stdout.write(output)
         # Display results in the order they would have been displayed, had the
         # work not been done in parallel.
+        if dashboard is not None:
+            dashboard.update(results)
         while current_result and current_result.done:
             if output is not None:
                 stdout.write(b']\n')
                 output = None
+            if dashboard is not None:
+                dashboard.clear()
             stdout.writelines(current_result.stdout)
 
             try:
@@ -805,6 +950,11 @@ def resume_tests(script_parts, options, features, layers, failures, errors,
         stdout.flush()
         time.sleep(0.01)  # Keep the loop from being too tight.
 
+    if dashboard is not None:
+        dashboard.update(results)
+        dashboard.clear()
+        stdout.flush()
+
     # Return the total number of tests run.
     return sum(r.num_ran for r in results)
 
@@ -813,7 +963,7 @@ def tear_down_unneeded(options, needed, setup_layers, errors, optional=False):
     # Tear down any layers not needed for these tests. The unneeded layers
     # might interfere.
     unneeded = [layer for layer in setup_layers if layer not in needed]
-    unneeded = order_by_bases(unneeded)
+    unneeded = order_by_bases(unneeded, layer_graph(options))
     unneeded.reverse()
     output = options.output
     for layer in unneeded:
@@ -846,6 +996,9 @@ Try running layer %r by itself.
 
 def setup_layer(options, layer, setup_layers):
     assert layer is not object
+    if options.concurrent_setup and not options.post_mortem:
+        setup_layers_concurrently(options, layer, setup_layers)
+        return
     output = options.output
     if layer not in setup_layers:
         for base in layer.__bases__:
@@ -875,6 +1028,82 @@ def setup_layer(options, layer, setup_layers):
         setup_layers[layer] = 1
 
 
+def setup_layers_concurrently(options, layer, setup_layers):
+    """Set up a layer and its bases, running independent set ups in threads.
+
+    A layer which defines a true ``threadSafeSetUp`` attribute itself (it
+    is not inherited) is set up in a thread of its own as soon as its
+    bases are set up.  Other layers are
+    set up in the main thread while no other set up is running.
+
+    Set ups are reported in the same order as without concurrency, once
+    they are done.  If a set up fails, no further set ups are started and
+    the first failure is raised after the running ones have finished.
+    """
+    graph = layer_graph(options)
+    output = options.output
+    pending = [ly for ly in graph.ordered_bases(layer)
+               if ly not in setup_layers]
+    waiting = list(pending)
+    done = queue.Queue()
+    finished = {}
+    running = 0
+    failure = None
+
+    def set_up(ly):
+        t = time.time()
+        try:
+            if hasattr(ly, 'setUp'):
+                ly.setUp()
+        except BaseException:
+            done.put((ly, time.time() - t, sys.exc_info()))
+        else:
+            done.put((ly, time.time() - t, None))
+
+    def report():
+        while pending and pending[0] in finished:
+            ly = pending.pop(0)
+            output.start_set_up(name_from_layer(ly))
+            output.stop_set_up(finished[ly])
+
+    while waiting or running:
+        if failure is None:
+            ready = [ly for ly in waiting
+                     if all(base in setup_layers for base in ly.__bases__
+                            if base is not object)]
+            for ly in ready:
+                if ly.__dict__.get('threadSafeSetUp', False):
+                    waiting.remove(ly)
+                    running += 1
+                    threading.Thread(
+                        target=set_up, args=(ly,), daemon=True,
+                        name='setUp of %s' % name_from_layer(ly)).start()
+            if not running and ready:
+                waiting.remove(ready[0])
+                running += 1
+                set_up(ready[0])
+        if not running:
+            break
+        ly, seconds, exc_info = done.get()
+        running -= 1
+        if exc_info is None:
+            setup_layers[ly] = 1
+            finished[ly] = seconds
+            report()
+        elif failure is None:
+            failure = ly, exc_info
+
+    if failure is not None:
+        ly, exc_info = failure
+        pending = [p for p in pending if p in finished]
+        report()
+        output.start_set_up(name_from_layer(ly))
+        try:
+            raise exc_info[1].with_traceback(exc_info[2])
+        finally:
+            exc_info = failure = None
+
+
 class TestResult(unittest.TestResult):
 
     def __init__(self, options, tests, layer_name=None):
@@ -882,9 +1111,34 @@ class TestResult(unittest.TestResult):
         self.options = options
         # Calculate our list of relevant layers we need to call testSetUp
         # and testTearDown on.
-        layers = []
-        gather_layers(layer_from_name(layer_name), layers)
-        self.layers = order_by_bases(layers)
+        self.layers = layer_graph(options).ordered_bases(
+            layer_from_name(layer_name))
+        # Look the hooks up only once, they are called for every test.
+        self._test_set_ups = [
+            layer.testSetUp for layer in self.layers
+            if hasattr(layer, 'testSetUp')]
+        self._test_tear_downs = [
+            layer.testTearDown for layer in reversed(self.layers)
+            if hasattr(layer, 'testTearDown')]
+        self._ignore_new_threads = [
+            re.compile(pattern) for pattern in options.ignore_new_threads]
+        # The generation to collect after each test, and the number of
+        # tests between full collections (see --gc-after-test and
+        # --gc-mode).
+        gc_mode = getattr(options, 'gc_mode', None)
+        if uses_refcounts and (
+                getattr(options, 'gc_after_test', False) or gc_mode):
+            mode, self._gc_sample = gc_mode or ('full', None)
+            self._gc_generation = 2 if mode == 'full' else 0
+        else:
+            self._gc_generation = self._gc_sample = None
+        # The tests run since the last full collection when sampling.
+        self._gc_sampled = []
+        # The threads running before a test, and their counts.  The
+        # threads are only enumerated again if the counts changed.
+        threadsupport.count_started_threads()
+        self._threads = None
+        self._thread_counts = None
         count = 0
         for test in tests:
             count += test.countTestCases()
@@ -898,9 +1152,8 @@ class TestResult(unittest.TestResult):
         """A layer may define a setup method to be called before each
         individual test.
         """
-        for layer in self.layers:
-            if hasattr(layer, 'testSetUp'):
-                layer.testSetUp()
+        for test_set_up in self._test_set_ups:
+            test_set_up()
 
     def testTearDown(self):
         """A layer may define a teardown method to be called after each
@@ -910,9 +1163,8 @@ class TestResult(unittest.TestResult):
            resources or resetting external systems such as relational
            databases or daemons.
         """
-        for layer in self.layers[-1::-1]:
-            if hasattr(layer, 'testTearDown'):
-                layer.testTearDown()
+        for test_tear_down in self._test_tear_downs:
+            test_tear_down()
 
     def _makeBufferedStdStream(self):
         """Make a buffered stream to replace a standard stream."""
@@ -928,6 +1180,28 @@ class TestResult(unittest.TestResult):
         return BufferedStandardStream(
             io.BytesIO(), newline='\n', write_through=True)
 
+    def _remember_threads(self):
+        """Remember the threads running before a test."""
+        counts = threadsupport.counts()
+        if counts != self._thread_counts:
+            self._threads = {
+                threadsupport.identity(t) for t in threadsupport.enumerate()}
+            self._thread_counts = counts
+
+    def _new_threads(self):
+        """Return the threads which were started by the test and still
+        run."""
+        counts = threadsupport.counts()
+        if counts == self._thread_counts:
+            return []
+        before = self._threads
+        threads = threadsupport.enumerate()
+        # The threads left behind are not new for the next test.
+        self._threads = {threadsupport.identity(t) for t in threads}
+        self._thread_counts = counts
+        return [t for t in threads
+                if t.is_alive() and threadsupport.identity(t) not in before]
+
     def _setUpStdStreams(self):
         """Set up buffered standard streams, if requested."""
         if self.options.buffer:
@@ -963,7 +1237,7 @@ class TestResult(unittest.TestResult):
 
         self.options.output.start_test(test, self.testsRun, self.count)
 
-        self._threads = threadsupport.enumerate()
+        self._remember_threads()
         self._start_time = time.time()
 
         self._setUpStdStreams()
@@ -976,11 +1250,11 @@ class TestResult(unittest.TestResult):
     def addSkip(self, test, reason):
         if not hasattr(self, "_test_state"):
             # ``startTest`` was not called -- set up extected state
-            self._test_state = test.__dict__
+            self._test_state = test.__dict__.copy()
             count = test.countTestCases()
             self.testsRun += count
             self.options.output.start_test(test, self.testsRun, self.count)
-            self._threads = threadsupport.enumerate()
+            self._remember_threads()
             if not hasattr(self, "_start_time"):
                 self._start_time = time.time()
         else:
@@ -1078,27 +1352,18 @@ class TestResult(unittest.TestResult):
         test.__dict__.clear()
         test.__dict__.update(self._test_state)
         del self._test_state
-        cycles = None
-        if (uses_refcounts and self.options.gc_after_test and
-                self.options.verbose >= 4):
-            gc_opts = gc.get_debug()
-            gc.set_debug(gc.DEBUG_SAVEALL)
-            gc.collect()
-            if gc.garbage:
-                g = DiGraph(gc.garbage)
-                for obj in gc.garbage:
-                    g.add_neighbors(obj, gc.get_referents(obj))
-                cycles = [[repr_lines(o) for o in c] for c in g.sccs()]
-                del gc.garbage[:]
-                g = obj = None  # avoid to hold cyclic garbage
-            gc.set_debug(gc_opts)
-        gccount = gc.collect() \
-            if uses_refcounts and self.options.gc_after_test else 0
+        if self._gc_generation is None:
+            gccount, cycles = 0, None
+        else:
+            gccount, cycles = self._collect_garbage(self._gc_generation)
         self.options.output.stop_test(test, gccount)
 
         if cycles:
             self.options.output.test_cycles(test, cycles)
 
+        if self._gc_sample:
+            self._sample_garbage(test)
+
         if is_jython:
             pass
         else:
@@ -1108,16 +1373,68 @@ class TestResult(unittest.TestResult):
                 #       printed for every subsequent test.
 
         # Did the test leave any new threads behind?
-        new_threads = []
-        for t in threadsupport.enumerate():
-            if t.is_alive() and t not in self._threads:
-                if not any([re.match(p, t.name)
-                            for p in self.options.ignore_new_threads]):
-                    new_threads.append(t)
+        new_threads = [
+            t for t in self._new_threads()
+            if not any(pattern.match(t.name)
+                       for pattern in self._ignore_new_threads)]
 
         if new_threads:
             self.options.output.test_threads(test, new_threads)
 
+        if self.options.release_tests:
+            self._release_outcomes()
+
+    def _collect_garbage(self, generation):
+        """Collect cyclic garbage of the given generation.
+
+        Return the number of objects collected and, on verbosity level 4
+        or higher, the cycles they formed.
+        """
+        cycles = None
+        if self.options.verbose >= 4:
+            gc_opts = gc.get_debug()
+            gc.set_debug(gc.DEBUG_SAVEALL)
+            gc.collect(generation)
+            if gc.garbage:
+                cycles = describe_cycles(gc.garbage)
+                del gc.garbage[:]
+                # The saved garbage was moved to the oldest generation.
+                generation = 2
+            gc.set_debug(gc_opts)
+        return gc.collect(generation), cycles
+
+    def _sample_garbage(self, test):
+        """Do a full collection every few tests, and at the end."""
+        self._gc_sampled.append(str(test))
+        if (len(self._gc_sampled) < self._gc_sample
+                and self.testsRun < self.count):
+            return
+        gccount, cycles = self._collect_garbage(2)
+        if gccount:
+            self.options.output.sampled_cycles(
+                self._gc_sampled, gccount, cycles)
+        self._gc_sampled = []
+
+    def _release_outcomes(self):
+        """Replace the tests recorded since the last call by their names.
+
+        The base class keeps the tests themselves in its lists of outcomes
+        (the tracebacks are already formatted), so this drops the last
+        references to finished tests that the result holds.
+        """
+        for outcomes in (self.failures, self.errors, self.skipped,
+                         self.expectedFailures):
+            i = len(outcomes)
+            while i and not isinstance(outcomes[i - 1][0], str):
+                i -= 1
+                test, text = outcomes[i]
+                outcomes[i] = (str(test), text)
+        outcomes = self.unexpectedSuccesses
+        i = len(outcomes)
+        while i and not isinstance(outcomes[i - 1], str):
+            i -= 1
+            outcomes[i] = str(outcomes[i])
+
 
 def layer_from_name(layer_name):
     """Return the layer for the corresponding layer_name by discovering
@@ -1176,27 +1493,137 @@ def layer_sort_key(layer):
         binding.clear()  # break reference cycle
 
 
-def order_by_bases(layers):
+def order_by_bases(layers, graph=None):
     """Order the layers from least to most specific (bottom to top).
 
     Puts unit tests first.  Groups layers with common base layers together.
     Sorts the rest alphabetically.  Removes duplicates.
     """
-    layers = sorted(layers, key=layer_sort_key, reverse=True)
+    if graph is None:
+        graph = LayerGraph()
+    wanted = set(layers)
+    layers = sorted(layers, key=graph.sort_key, reverse=True)
     gathered = []
     for layer in layers:
-        gather_layers(layer, gathered)
+        gathered.extend(graph.gather(layer))
     gathered.reverse()
-    seen = {}
+    seen = set()
     result = []
     for layer in gathered:
         if layer not in seen:
-            seen[layer] = 1
-            if layer in layers:
+            seen.add(layer)
+            if layer in wanted:
                 result.append(layer)
     return result
 
 
+def layer_set_ups(layers, graph=None):
+    """Return the layers set up when running the tests of *layers* in order.
+
+    Layers which are not needed by the next layer are torn down before it
+    is set up (see tear_down_unneeded), and may need to be set up again
+    later on.
+    """
+    if graph is None:
+        graph = LayerGraph()
+    set_ups = []
+    current = frozenset()
+    for layer in layers:
+        set_ups.extend(
+            ly for ly in graph.ordered_bases(layer) if ly not in current)
+        current = graph.needed(layer)
+    return set_ups
+
+
+def order_by_cost(layers, setup_cost, graph=None):
+    """Order the layers so that setting them (and their bases) up is cheap.
+
+    *setup_cost* returns the estimated seconds it takes to set up a layer.
+    Starting from the order of order_by_bases, the layer which is cheapest
+    to set up next is run next.  The result is never more expensive than
+    the order of order_by_bases.
+    """
+    if graph is None:
+        graph = LayerGraph()
+    default = order_by_bases(layers, graph)
+
+    result = []
+    remaining = list(default)
+    current = frozenset()
+    while remaining:
+        # min() picks the first of equally cheap layers, which keeps the
+        # default order wherever it does not matter.
+        layer = min(remaining, key=lambda ly: sum(
+            setup_cost(b) for b in graph.needed(ly) - current))
+        remaining.remove(layer)
+        result.append(layer)
+        current = graph.needed(layer)
+
+    def total(order):
+        return sum(setup_cost(ly) for ly in layer_set_ups(order, graph))
+
+    if total(result) < total(default):
+        return result
+    return default
+
+
+class LayerGraph:
+    """The layers of a test run and their bases.
+
+    What we need to know about a layer only depends on its bases, so it is
+    computed once per layer and then looked up.
+    """
+
+    def __init__(self):
+        self._gathered = {}
+        self._needed = {}
+        self._ordered_bases = {}
+        self._sort_keys = {}
+
+    def gather(self, layer):
+        """Return the layer and its bases, as gather_layers finds them."""
+        try:
+            return self._gathered[layer]
+        except KeyError:
+            gathered = []
+            gather_layers(layer, gathered)
+            gathered = self._gathered[layer] = tuple(gathered)
+            return gathered
+
+    def needed(self, layer):
+        """Return the set of layers which need to be set up for a layer."""
+        try:
+            return self._needed[layer]
+        except KeyError:
+            needed = self._needed[layer] = frozenset(self.gather(layer))
+            return needed
+
+    def ordered_bases(self, layer):
+        """Return the layers needed by a layer, ordered by their bases."""
+        try:
+            return self._ordered_bases[layer]
+        except KeyError:
+            ordered = self._ordered_bases[layer] = tuple(
+                order_by_bases(self.gather(layer), self))
+            return ordered
+
+    def sort_key(self, layer):
+        """Return the layer_sort_key of a layer."""
+        try:
+            return self._sort_keys[layer]
+        except KeyError:
+            key = self._sort_keys[layer] = layer_sort_key(layer)
+            return key
+
+
+def layer_graph(options):
+    """Return the LayerGraph of the test run the options are for."""
+    graph = getattr(options, 'layer_graph', None)
+    if graph is None:
+        graph = options.layer_graph = LayerGraph()
+    return graph
+
+
 def gather_layers(layer, result):
     if layer is not object:
         result.append(layer)
@@ -1219,6 +1646,46 @@ class FakeInputContinueGenerator:
         pass
 
 
+def describe_cycles(objects, max_cycles=20, max_objects=10):
+    """describe the reference cycles among *objects*.
+
+    Return a list with the ``repr_lines`` of the objects of each cycle.
+    Only the first *max_objects* objects of a cycle and the first
+    *max_cycles* cycles are represented individually, the others are
+    summarized by the number of objects of each type.
+    """
+    g = ArrayDiGraph.from_objects(objects, gc.get_referents)
+    cycles = []
+    n_more = 0
+    more = Counter()
+    for scc in g.sccs():
+        if len(cycles) < max_cycles:
+            cycle = [repr_lines(objects[i]) for i in scc[:max_objects]]
+            if len(scc) > max_objects:
+                others = Counter(
+                    type(objects[i]).__name__ for i in scc[max_objects:])
+                cycle.append(["and %d more objects: %s" % (
+                    len(scc) - max_objects, type_counts(others))])
+            cycles.append(cycle)
+        else:
+            n_more += 1
+            more.update(type(objects[i]).__name__ for i in scc)
+    if n_more:
+        cycles.append("and %d more cycles of %d objects: %s" % (
+            n_more, sum(more.values()), type_counts(more)))
+    return cycles
+
+
+def type_counts(counter, max_types=5):
+    """summarize a ``Counter`` of type names."""
+    most_common = counter.most_common(max_types)
+    counts = ["%d %s" % (n, name) for name, n in most_common]
+    others = sum(counter.values()) - sum(n for name, n in most_common)
+    if others:
+        counts.append("%d others" % others)
+    return ", ".join(counts)
+
+
 def repr_lines(obj, max_width=75, max_lines=5):
     """represent *obj* by a sequence of text lines.
 
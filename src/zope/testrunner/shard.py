@@ -0,0 +1,176 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Run only one of several shards of the tests.
+"""
+
+import math
+
+import zope.testrunner.feature
+from zope.testrunner.filter import select_layers
+from zope.testrunner.find import name_from_layer
+from zope.testrunner.timings import Timings
+
+
+# Cost of a test we have no recorded duration for, if we have no recorded
+# durations at all.
+DEFAULT_TEST_COST = 1.0
+
+
+def partition(layers, n_shards, test_cost, setup_cost):
+    """Partition tests into *n_shards* shards of about the same cost.
+
+    *layers* maps layer names to sequences of test ids, *test_cost* maps a
+    test id and *setup_cost* a layer name to the estimated seconds it takes.
+    A layer is kept whole if that is cheap enough, otherwise it is sliced,
+    and every shard running a slice pays for setting up the layer.
+
+    Returns a list of *n_shards* ``(cost, {layer name: [test ids]})``
+    tuples.  The result only depends on the arguments, not on the order in
+    which layers or tests are given.
+
+    >>> shards = partition({'A': ['a1', 'a2', 'a3', 'a4'], 'B': ['b1']},
+    ...                    2, lambda test_id: 1.0, lambda layer: 0.0)
+    >>> for cost, selected in shards:
+    ...     print(cost, sorted(selected.items()))
+    3.0 [('A', ['a1', 'a2']), ('B', ['b1'])]
+    2.0 [('A', ['a3', 'a4'])]
+
+    An expensive layer set up is not paid twice if it can be avoided:
+
+    >>> shards = partition({'A': ['a1', 'a2', 'a3', 'a4'], 'B': ['b1']},
+    ...                    2, lambda test_id: 1.0,
+    ...                    lambda layer: 10.0 if layer == 'A' else 0.0)
+    >>> for cost, selected in shards:
+    ...     print(cost, sorted(selected.items()))
+    14.0 [('A', ['a1', 'a2', 'a3', 'a4'])]
+    1.0 [('B', ['b1'])]
+    """
+    pieces = []
+    total = 0.0
+    for name in sorted(layers):
+        test_ids = sorted(layers[name])
+        costs = [test_cost(test_id) for test_id in test_ids]
+        layer_cost = sum(costs)
+        pieces.append((name, test_ids, costs, layer_cost, setup_cost(name)))
+        total += layer_cost + setup_cost(name)
+    target = total / n_shards
+
+    # Work items are whole layers or slices of layers.
+    items = []
+    for name, test_ids, costs, layer_cost, set_up in pieces:
+        if set_up + layer_cost <= target or set_up >= target:
+            n_slices = 1
+        else:
+            n_slices = math.ceil(layer_cost / (target - set_up))
+        n_slices = max(1, min(n_slices, n_shards, len(test_ids)))
+        start = 0
+        done = 0.0
+        for i in range(n_slices):
+            end = start
+            limit = layer_cost * (i + 1) / n_slices
+            if i == n_slices - 1:
+                end = len(test_ids)
+            else:
+                # leave at least one test for each remaining slice
+                max_end = len(test_ids) - (n_slices - i - 1)
+                while end < max_end and (
+                        end == start or done + costs[end] / 2 <= limit):
+                    done += costs[end]
+                    end += 1
+            slice_cost = sum(costs[start:end]) + set_up
+            items.append((slice_cost, name, i, test_ids[start:end]))
+            start = end
+
+    # Longest processing time first: hand the most expensive remaining
+    # item to the least loaded shard.
+    items.sort(key=lambda item: (-item[0], item[1], item[2]))
+    shards = [(0.0, {}) for i in range(n_shards)]
+    for cost, name, i, test_ids in items:
+        index = min(range(n_shards), key=lambda j: (shards[j][0], j))
+        shard_cost, selected = shards[index]
+        selected.setdefault(name, []).extend(test_ids)
+        shards[index] = (shard_cost + cost, selected)
+    return shards
+
+
+class Shard(zope.testrunner.feature.Feature):
+    """Select the tests of one shard.
+
+    Layer subprocesses compute the same partition as their parent and
+    thus run the same tests.
+    """
+
+    def __init__(self, runner):
+        super().__init__(runner)
+        self.active = bool(runner.options.shard)
+
+    def global_setup(self):
+        options = self.runner.options
+        index, n_shards = options.shard
+        timings = Timings(options.timings)
+        known = list(timings.tests.values())
+        if known:
+            default_cost = sum(known) / len(known)
+        else:
+            default_cost = DEFAULT_TEST_COST
+
+        def test_cost(test_id):
+            return timings.tests.get(test_id, default_cost)
+
+        layers = self.runner.tests_by_layer_name
+        # Partition only the layers that will be run.  The result must not
+        # depend on whether we are running in a subprocess, so we ignore
+        # options.resume_layer here.
+        selected_layers = dict(layers)
+        select_layers(selected_layers, options)
+
+        # XXX Lazy import to avoid a circular import
+        from zope.testrunner.runner import gather_layers
+        from zope.testrunner.runner import layer_from_name
+
+        def setup_cost(layer_name):
+            # A shard has to set up the layer together with its bases.
+            gathered = []
+            gather_layers(layer_from_name(layer_name), gathered)
+            names = {name_from_layer(layer) for layer in gathered}
+            return sum(timings.layers.get(name, 0.0) for name in names)
+
+        tests = {name: [test.id() for test in suite]
+                 for name, suite in selected_layers.items()}
+        self.estimate, shard = partition(
+            tests, n_shards, test_cost, setup_cost)[index - 1]
+        self.estimated = bool(known)
+        self.n_tests = sum(len(test_ids) for test_ids in tests.values())
+        self.n_selected = sum(len(test_ids) for test_ids in shard.values())
+
+        for name in selected_layers:
+            if name not in shard:
+                del layers[name]
+                continue
+            wanted = set(shard[name])
+            suite = layers[name]
+            layers[name] = suite.__class__(
+                [test for test in suite if test.id() in wanted])
+
+    def report(self):
+        options = self.runner.options
+        if options.resume_layer is not None:
+            return
+        index, n_shards = options.shard
+        msg = "Selected shard %d of %d: %d of %d tests" % (
+            index, n_shards, self.n_selected, self.n_tests)
+        if self.estimated:
+            msg += ", estimated to take %s" % (
+                options.output.format_seconds(self.estimate))
+        options.output.info(msg + ".")
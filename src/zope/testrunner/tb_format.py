@@ -57,18 +57,95 @@ def _iter_chain(exc, custom_tb=None, seen=None):
         yield from it
 
 
+# Formatted tracebacks by traceback_key() (see _cached)
+_formatted = {}
+_FORMATTED_MAX = 1000
+
+
+def _locations(tb, with_info=True):
+    """Return the code locations of the entries of a traceback.
+
+    If with_info is true, returns None if a frame has a
+    ``__traceback_info__`` or ``__traceback_supplement__``, which
+    zope.exceptions includes in the formatted traceback, so that it is
+    more than the locations.
+    """
+    locations = []
+    while tb is not None:
+        frame = tb.tb_frame
+        if with_info and (
+                '__traceback_info__' in frame.f_locals
+                or '__traceback_supplement__' in frame.f_locals
+                or '__traceback_supplement__' in frame.f_globals):
+            return None
+        locations.append((frame.f_code, tb.tb_lineno, tb.tb_lasti))
+        tb = tb.tb_next
+    return tuple(locations)
+
+
+def traceback_key(t, v, tb):
+    """Return a key which is the same for tracebacks formatted the same.
+
+    These are tracebacks with the same code locations and an exception of
+    the same type with the same message.  Returns None if it cannot be
+    told whether they are formatted the same.
+    """
+    try:
+        message = str(v)
+    except Exception:
+        return None
+    locations = _locations(tb)
+    if locations is None:
+        return None
+    return t, type(v), message, locations
+
+
+def _cached(key, format):
+    """Return format(), reusing the result for the same key.
+
+    A test fixture which is broken can make thousands of tests fail in the
+    same way, so formatting their tracebacks once saves a lot of time.
+    """
+    if key is None:
+        return format()
+    try:
+        return _formatted[key]
+    except KeyError:
+        pass
+    result = format()
+    if len(_formatted) >= _FORMATTED_MAX:
+        _formatted.clear()
+    _formatted[key] = result
+    return result
+
+
 def format_exception(t, value=_sentinel, tb=_sentinel, limit=None, chain=None):
     v, tb = _parse_value_tb(t, value, tb)
     if chain:
         values = _iter_chain(v, tb)
     else:
         values = [(v, tb)]
-    fmt = zope.exceptions.exceptionformatter.TextExceptionFormatter(
-        limit=None, with_filenames=True)
     for v, tb in values:
         if isinstance(v, str):
             return v
-        return fmt.formatException(t, v, tb)
+        key = traceback_key(t, v, tb)
+        if key is not None:
+            key = ('exception',) + key
+        return list(_cached(key, lambda: _format_exception(t, v, tb)))
+
+
+def _format_exception(t, v, tb):
+    fmt = zope.exceptions.exceptionformatter.TextExceptionFormatter(
+        limit=None, with_filenames=True)
+    return fmt.formatException(t, v, tb)
+
+
+def format_tb(tb):
+    """Return the stack trace of a traceback as formatted by the standard
+    library (which does not show ``__traceback_info__``).
+    """
+    return _cached(('tb', _locations(tb, with_info=False)),
+                   lambda: ''.join(traceback.format_tb(tb)))
 
 
 def print_exception(t, value=_sentinel, tb=_sentinel,
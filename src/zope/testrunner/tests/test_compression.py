@@ -0,0 +1,119 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Unit tests for the compression of reports
+"""
+import contextlib
+import gzip
+import io
+import os
+import sys
+import unittest
+import zlib
+from unittest import mock
+
+from zope import testrunner
+from zope.testrunner import runner
+from zope.testrunner.compression import CompressedWriter
+
+
+try:
+    import subunit
+except ImportError:
+    subunit = None
+
+
+class TestCompressedWriter(unittest.TestCase):
+
+    def test_gzip(self):
+        output = io.BytesIO()
+        writer = CompressedWriter(output, 'gzip')
+        writer.write(b'first line\n')
+        writer.write(memoryview(b'second line\n'))
+        writer.close()
+        self.assertTrue(writer.closed)
+        self.assertFalse(output.closed)
+        self.assertEqual(gzip.decompress(output.getvalue()),
+                         b'first line\nsecond line\n')
+
+    def test_flush(self):
+        # Flushing makes what was written so far decompressable.
+        output = io.BytesIO()
+        writer = CompressedWriter(output, 'gzip')
+        writer.write(b'first line\n')
+        writer.flush()
+        decompressor = zlib.decompressobj(31)
+        self.assertEqual(decompressor.decompress(output.getvalue()),
+                         b'first line\n')
+
+    def test_flush_interval(self):
+        output = io.BytesIO()
+        writer = CompressedWriter(output, 'gzip', flush_interval=3600)
+        writer.write(b'first line\n')
+        writer.flush()
+        decompressor = zlib.decompressobj(31)
+        self.assertEqual(decompressor.decompress(output.getvalue()), b'')
+        writer.close()
+        self.assertEqual(gzip.decompress(output.getvalue()), b'first line\n')
+
+    def test_unsupported_method(self):
+        with self.assertRaises(ValueError):
+            CompressedWriter(io.BytesIO(), 'lzma')
+
+
+@unittest.skipIf(subunit is None, 'subunit is not installed')
+class TestCompressSubunit(unittest.TestCase):
+
+    def setUp(self):
+        # Running the tests imports them from testrunner-ex.
+        saved_path = sys.path[:]
+        saved_modules = sys.modules.copy()
+
+        def restore():
+            sys.path[:] = saved_path
+            sys.modules.clear()
+            sys.modules.update(saved_modules)
+        self.addCleanup(restore)
+
+    def test_subunit_stream_is_compressed(self):
+        directory_with_tests = os.path.join(
+            os.path.dirname(__file__), 'testrunner-ex')
+        defaults = [
+            '--path', directory_with_tests,
+            '--tests-pattern', '^sampletestsf?$',
+        ]
+        argv = ['test', '--subunit-v2', '--compress-reports', 'gzip',
+                '-t', 'sample3.sampletests.TestA']
+        stdout = io.TextIOWrapper(io.BytesIO())
+        with contextlib.redirect_stdout(stdout):
+            testrunner.run_internal(defaults, argv)
+            # stdout is restored.
+            self.assertIs(sys.stdout, stdout)
+        stream = gzip.decompress(stdout.buffer.getvalue())
+        self.assertIn(b'sample3.sampletests.TestA.test_x1', stream)
+        self.assertIn(b'sample3.sampletests.TestA.test_z0', stream)
+
+    def test_stream_is_finished_if_running_the_tests_fails(self):
+        directory_with_tests = os.path.join(
+            os.path.dirname(__file__), 'testrunner-ex')
+        defaults = ['--path', directory_with_tests]
+        argv = ['test', '--subunit-v2', '--compress-reports', 'gzip']
+        stdout = io.TextIOWrapper(io.BytesIO())
+        with contextlib.redirect_stdout(stdout):
+            with mock.patch.object(runner.Runner, 'run_tests',
+                                   side_effect=RuntimeError('broken')):
+                with self.assertRaises(RuntimeError):
+                    testrunner.run_internal(defaults, argv)
+            self.assertIs(sys.stdout, stdout)
+        # The stream is complete.
+        gzip.decompress(stdout.buffer.getvalue())
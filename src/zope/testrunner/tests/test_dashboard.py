@@ -0,0 +1,168 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Unit tests for the status of parallel test runs
+"""
+import io
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from zope.testrunner import dashboard
+from zope.testrunner.formatter import OutputFormatter
+from zope.testrunner.runner import AbstractSubprocessResult
+
+
+class FakeTest:
+
+    def __init__(self, test_id):
+        self.test_id = test_id
+
+    def id(self):
+        return self.test_id
+
+
+class FakeSuite(list):
+
+    def countTestCases(self):
+        return len(self)
+
+
+class DashboardOptions:
+    processes = 2
+    progress_rate = 10
+    repeat = 1
+    timings = None
+    verbose = 0
+
+
+class TestDashboard(unittest.TestCase):
+
+    def setUp(self):
+        self.options = DashboardOptions()
+        self.options.output = OutputFormatter(self.options)
+        self.layers = [
+            ('layer.A', None, FakeSuite([FakeTest('a1'), FakeTest('a2')])),
+            ('layer.B', None, FakeSuite([FakeTest('b1')])),
+            ('layer.C', None, FakeSuite([FakeTest('c1'), FakeTest('c2')])),
+        ]
+        self.results = [AbstractSubprocessResult(layer_name, None)
+                        for layer_name, layer, tests in self.layers]
+        self.stream = io.BytesIO()
+        self.now = 100.0
+        patcher = mock.patch.object(
+            dashboard.time, 'monotonic', lambda: self.now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def make_dashboard(self, tty):
+        return dashboard.Dashboard(
+            self.options, self.layers, self.stream, tty=tty)
+
+    def written(self):
+        value = self.stream.getvalue().decode('utf-8')
+        self.stream.seek(0)
+        self.stream.truncate()
+        return value
+
+    def write_timings(self, data):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.options.timings = os.path.join(tmpdir, 'timings.json')
+        data.update(version=1, layer_stats={})
+        with open(self.options.timings, 'w') as f:
+            json.dump(data, f)
+
+    def test_plain_lines(self):
+        board = self.make_dashboard(tty=False)
+        board.update(self.results)
+        self.assertEqual(self.written(), '')
+        self.results[1].start_time = 100.0
+        self.results[0].start_time = 100.5
+        self.now = 101.0
+        board.update(self.results)
+        # Workers are numbered in the order of the layers.
+        self.assertEqual(self.written(), (
+            '  [1] Started layer.A: 2 tests\n'
+            '  [2] Started layer.B: 1 tests\n'))
+        self.results[1].num_ran = 1
+        self.results[1].done = True
+        self.now = 102.0
+        board.update(self.results)
+        self.assertEqual(self.written(), (
+            '  [2] Finished layer.B: 1/1 tests in 2.000 seconds\n'
+            '  1/3 layers done in 2.000 seconds\n'))
+
+    def test_layer_started_and_finished_between_updates(self):
+        board = self.make_dashboard(tty=False)
+        self.results[0].start_time = 100.0
+        self.results[0].num_ran = 2
+        self.results[0].done = True
+        board.update(self.results)
+        self.assertEqual(self.written(), (
+            '  [1] Started layer.A: 2 tests\n'
+            '  [1] Finished layer.A: 2/2 tests in 0.000 seconds\n'
+            '  1/3 layers done in 0.000 seconds\n'))
+        self.assertEqual(board.workers, [None, None])
+
+    def test_terminal(self):
+        board = self.make_dashboard(tty=True)
+        self.results[0].start_time = 100.0
+        self.results[0].tests_started = 1
+        self.now = 101.0
+        board.update(self.results)
+        self.assertEqual(self.written(), (
+            '  [1] Running layer.A: 1/2 tests for 1.000 seconds\n'
+            '  [2] idle\n'
+            '  0/3 layers done in 1.000 seconds\n'))
+        # The lines are not redrawn more often than --progress-rate allows
+        self.now = 101.05
+        board.update(self.results)
+        self.assertEqual(self.written(), '')
+        self.now = 101.2
+        board.update(self.results)
+        self.assertEqual(self.written(), (
+            '\x1b[3F\x1b[J'
+            '  [1] Running layer.A: 1/2 tests for 1.200 seconds\n'
+            '  [2] idle\n'
+            '  0/3 layers done in 1.200 seconds\n'))
+        board.clear()
+        self.assertEqual(self.written(), '\x1b[3F\x1b[J')
+        board.clear()
+        self.assertEqual(self.written(), '')
+
+    def test_time_left(self):
+        self.write_timings({
+            'tests': {'a1': 1.0, 'a2': 3.0, 'b1': 2.0},
+            'layers': {'layer.C': 4.0},
+        })
+        board = self.make_dashboard(tty=True)
+        # Unknown tests take the mean of the known ones.
+        self.assertEqual(board.estimates,
+                         {'layer.A': 4.0, 'layer.B': 2.0, 'layer.C': 8.0})
+        self.assertEqual(board.time_left(self.results, self.now), 7.0)
+        self.results[0].start_time = 100.0
+        self.results[0].done = True
+        self.results[1].start_time = 100.0
+        self.now = 101.0
+        self.assertEqual(board.time_left(self.results, self.now), 4.5)
+        self.assertEqual(
+            board.format_totals(self.results, self.now),
+            '  1/3 layers done in 1.000 seconds, about 4.500 seconds left')
+
+    def test_no_time_left_without_timings(self):
+        board = self.make_dashboard(tty=True)
+        self.assertIsNone(board.time_left(self.results, self.now))
@@ -1,5 +1,6 @@
 from unittest import TestCase
 
+from ..digraph import ArrayDiGraph
 from ..digraph import DiGraph
 
 
@@ -65,6 +66,62 @@ class Tests(TestCase):
         self.assertEqual(sorted(sccs[0] + sccs[1]), list(range(10)))
 
 
+class ArrayTests(TestCase):
+    def test_scc_linear(self):
+        # long enough to overflow the stack of a recursive implementation
+        n = 100000
+        g = array_dig_from_dict(
+            {i: (i + 1,) if i + 1 < n else () for i in range(n)})
+        self.assertEqual(len(g), n)
+        self.assertEqual(list(g.sccs()), [])
+        self.assertEqual(sorted(g.sccs(True)), [[i] for i in range(n)])
+
+    def test_scc_long_cycle(self):
+        n = 100000
+        g = array_dig_from_dict({i: ((i + 1) % n,) for i in range(n)})
+        sccs = list(g.sccs())
+        self.assertEqual(len(sccs), 1)
+        self.assertEqual(sorted(sccs[0]), list(range(n)))
+
+    def test_trivial_cycle(self):
+        g = array_dig_from_dict({0: 1, 1: (1, 2), 2: ()})
+        self.assertEqual(list(g.sccs()), [[1]])
+
+    def test_forest(self):
+        g = array_dig_from_dict({0: (), 1: ()})
+        self.assertEqual(sorted(g.sccs(True)), [[0], [1]])
+
+    def test_complex(self):
+        g = array_dig_from_dict({0: 1, 1: 2, 2: (3, 4), 3: (0, 4),
+                                 4: (5, 2), 5: (6, 9), 6: (5, 7),
+                                 7: 8, 8: 9, 9: (5, 6)})
+        sccs = sorted(sorted(c) for c in g.sccs())
+        self.assertEqual(sccs, [[0, 1, 2, 3, 4], [5, 6, 7, 8, 9]])
+
+    def test_from_objects(self):
+        a, b, c = [], [], []
+        a.append(b)
+        b.extend([a, c, {}])  # the dict is not a node
+        g = ArrayDiGraph.from_objects([a, b, c], lambda obj: obj)
+        self.assertEqual(list(g.nodes()), [0, 1, 2])
+        self.assertEqual(list(g.neighbors(0)), [1])
+        self.assertEqual(list(g.neighbors(1)), [0, 2])
+        self.assertEqual(list(g.neighbors(2)), [])
+        self.assertEqual([sorted(c) for c in g.sccs()], [[0, 1]])
+
+
+def array_dig_from_dict(d):
+    offsets = [0]
+    targets = []
+    for i in range(len(d)):
+        nbs = d[i]
+        if not hasattr(nbs, "__len__"):
+            nbs = nbs,
+        targets.extend(nbs)
+        offsets.append(len(targets))
+    return ArrayDiGraph(offsets, targets)
+
+
 def dig_from_dict(d):
     g = DiGraph(list(d), False)
     for e in d.items():
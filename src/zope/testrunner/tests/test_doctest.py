@@ -235,6 +235,11 @@ def test_suite():
             'testrunner-repeat.rst',
             'testrunner-knit.rst',
             'testrunner-shuffle.rst',
+            'testrunner-shard.rst',
+            'testrunner-timings.rst',
+            'testrunner-journal.rst',
+            'testrunner-jsonl.rst',
+            'testrunner-dashboard.rst',
             'testrunner-stops-when-stop-on-error.rst',
             'testrunner-new-threads.rst',
             'testrunner-subtest.rst',
@@ -246,6 +251,7 @@ def test_suite():
                              optionflags=optionflags),
         doctest.DocTestSuite('zope.testrunner.options'),
         doctest.DocTestSuite('zope.testrunner.find'),
+        doctest.DocTestSuite('zope.testrunner.shard'),
     ]
 
     # PyPy uses a different garbage collector
@@ -298,6 +304,14 @@ def test_suite():
         )
     )
 
+    suites.append(
+        doctest.DocFileSuite(
+            'testrunner-report-leaks.rst',
+            setUp=setUp, tearDown=tearDown,
+            optionflags=optionflags,
+            checker=checker)
+    )
+
     suites.append(
         doctest.DocFileSuite(
             'testrunner-report-skipped.rst',
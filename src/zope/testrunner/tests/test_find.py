@@ -15,9 +15,13 @@
 
 import doctest
 import os.path
+import shutil
+import sys
+import tempfile
 import unittest
 
 from zope.testrunner import find
+from zope.testrunner.options import get_options
 
 
 class UniquenessOptions:
@@ -29,6 +33,7 @@ class UniquenessOptions:
     test = []
     module = []
     require_unique_ids = True
+    test_ids = None
 
 
 class TestUniqueness(unittest.TestCase):
@@ -84,6 +89,168 @@ class TestUniqueness(unittest.TestCase):
             str(e.exception))
 
 
+class TestTestIds(unittest.TestCase):
+    """Test selecting tests by exact test ids."""
+
+    class Sample(unittest.TestCase):
+        def test_a(self):
+            pass
+
+        def test_aa(self):
+            pass
+
+        def test_b(self):
+            pass
+
+    def selected(self, test_ids):
+        options = UniquenessOptions()
+        options.require_unique_ids = False
+        suite = unittest.defaultTestLoader.loadTestsFromTestCase(self.Sample)
+        return [test._testMethodName
+                for test, layer in find.tests_from_suite(
+                    unittest.TestSuite([suite]), options,
+                    test_ids=test_ids)]
+
+    def test_no_test_ids_selects_all(self):
+        self.assertEqual(self.selected(None), ['test_a', 'test_aa', 'test_b'])
+
+    def test_test_ids_match_exactly(self):
+        prefix = self.Sample.__module__ + '.' + self.Sample.__qualname__
+        self.assertEqual(
+            self.selected({prefix + '.test_a', prefix + '.test_b'}),
+            ['test_a', 'test_b'])
+
+    def test_test_ids_match_test_names(self):
+        test = self.Sample('test_aa')
+        self.assertEqual(self.selected({str(test)}), ['test_aa'])
+
+    def test_possible_test_modules(self):
+        self.assertEqual(
+            find.possible_test_modules({'a.b.test_c', 'a.d.test_e'}),
+            {'a', 'a.b', 'a.d'})
+        self.assertIsNone(find.possible_test_modules({'a.b', 'test_c'}))
+
+
+class TestTestIdsFromOtherModules(unittest.TestCase):
+    """Test selecting tests collected by the suite of another module."""
+
+    files = {
+        '__init__.py': '',
+        'impl.py': (
+            'def double(x):\n'
+            '    """\n'
+            '    >>> double(2)\n'
+            '    4\n'
+            '    """\n'
+            '    return 2 * x\n'),
+        'tests/__init__.py': '',
+        'tests/test_doc.py': (
+            'import doctest\n'
+            'import unittest\n'
+            'class TestOwn(unittest.TestCase):\n'
+            '    def test_own(self):\n'
+            '        pass\n'
+            'def test_suite():\n'
+            '    return unittest.TestSuite([\n'
+            '        unittest.defaultTestLoader.loadTestsFromTestCase(\n'
+            '            TestOwn),\n'
+            '        doctest.DocTestSuite("findpkg.impl"),\n'
+            '    ])\n'),
+        'tests/test_other.py': (
+            'import unittest\n'
+            'class TestOther(unittest.TestCase):\n'
+            '    def test_other(self):\n'
+            '        pass\n'),
+    }
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmpdir)
+        for name, content in self.files.items():
+            path = os.path.join(self.tmpdir, 'findpkg', name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(content)
+        self.addCleanup(setattr, sys, 'path', sys.path[:])
+        self.addCleanup(sys.modules.update, sys.modules.copy())
+        self.addCleanup(self.forget_modules)
+
+    def forget_modules(self):
+        for name in list(sys.modules):
+            if name.split('.')[0] == 'findpkg':
+                del sys.modules[name]
+
+    def selected(self, test_ids):
+        path = os.path.join(self.tmpdir, 'test_ids.txt')
+        with open(path, 'w') as f:
+            f.writelines(test_id + '\n' for test_id in test_ids)
+        options = get_options([
+            'test', '--test-path', self.tmpdir, '--tests-from-file', path])
+        sys.path.insert(0, self.tmpdir)
+        return sorted(test.id()
+                      for tests in find.find_tests(options).values()
+                      for test in tests)
+
+    def test_test_from_defining_module(self):
+        self.assertEqual(
+            self.selected(['findpkg.tests.test_doc.TestOwn.test_own']),
+            ['findpkg.tests.test_doc.TestOwn.test_own'])
+        # All tests were found, so the other test modules were not imported.
+        self.assertNotIn('findpkg.tests.test_other', sys.modules)
+
+    def test_test_collected_by_another_module(self):
+        self.assertEqual(
+            self.selected(['findpkg.impl.double',
+                           'findpkg.tests.test_other.TestOther.test_other']),
+            ['findpkg.impl.double',
+             'findpkg.tests.test_other.TestOther.test_other'])
+
+
+class TestTestsFromSuite(unittest.TestCase):
+    """Test walking trees of test suites."""
+
+    class Sample(unittest.TestCase):
+        def test_a(self):
+            pass
+
+    def walk(self, suite):
+        options = UniquenessOptions()
+        options.require_unique_ids = False
+        return [(test._testMethodName, layer)
+                for test, layer in find.tests_from_suite(suite, options)]
+
+    def test_nearest_layer_wins(self):
+        inner = unittest.TestSuite([self.Sample('test_a')])
+        inner.layer = 'inner'
+        outer = unittest.TestSuite([inner, self.Sample('test_a')])
+        outer.layer = 'outer'
+        self.assertEqual(
+            self.walk(unittest.TestSuite([outer, self.Sample('test_a')])),
+            [('test_a', 'inner'), ('test_a', 'outer'),
+             ('test_a', 'zope.testrunner.layer.UnitTests')])
+
+    def test_deeply_nested_suites(self):
+        suite = unittest.TestSuite([self.Sample('test_a')])
+        for i in range(5000):
+            suite = unittest.TestSuite([suite])
+        self.assertEqual(len(self.walk(suite)), 1)
+
+    def test_find_tests_returns_flat_suites(self):
+        suite = unittest.TestSuite([
+            unittest.TestSuite([self.Sample('test_a')]),
+            self.Sample('test_a'),
+        ])
+        options = UniquenessOptions()
+        options.require_unique_ids = False
+        options.test = ['']
+        suites = find.find_tests(options, [suite])
+        layer_suite = suites['zope.testrunner.layer.UnitTests']
+        self.assertIsInstance(layer_suite, find.LayerSuite)
+        self.assertEqual(layer_suite.countTestCases(), 2)
+        self.assertEqual(
+            [type(test) for test in layer_suite], [self.Sample, self.Sample])
+
+
 class TestIdentifierMatches(unittest.TestCase):
     """Test which folders are ignored by the test runner."""
 
@@ -0,0 +1,173 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Unit tests for the testrunner's output formatter
+"""
+import io
+import sys
+import unittest
+from contextlib import redirect_stdout
+
+from zope.testrunner import formatter
+
+
+class RecordingStream(io.StringIO):
+    """A stream which remembers what was written when it was flushed."""
+
+    def __init__(self):
+        super().__init__()
+        self.flushed = []
+
+    def flush(self):
+        self.flushed.append(self.getvalue())
+
+
+class FormatterOptions:
+    verbose = 0
+    progress = False
+    resume_layer = None
+    processes = 1
+    flush_interval = 3600
+
+
+class TestFlushPolicy(unittest.TestCase):
+
+    def setUp(self):
+        self.options = FormatterOptions()
+        self.output = formatter.OutputFormatter(self.options)
+        self.stdout = RecordingStream()
+
+    def run_tests(self, n):
+        with redirect_stdout(self.stdout):
+            for i in range(n):
+                self.output.start_test(self, i + 1, n)
+                self.output.test_success(self, 0)
+                self.output.stop_test(self, 0)
+            self.output.stop_tests()
+
+    def test_flushes_only_once_per_interval(self):
+        self.options.verbose = 1
+        self.run_tests(5)
+        # The first test, and the end of the tests
+        self.assertEqual(self.stdout.flushed, ['.', '.....\n'])
+
+    def test_flush_interval_zero_flushes_for_every_test(self):
+        self.options.verbose = 1
+        self.options.flush_interval = 0
+        self.run_tests(2)
+        self.assertEqual(self.stdout.flushed,
+                         ['.', '.', '..', '..', '..\n'])
+
+    def test_flushes_before_every_named_test(self):
+        self.options.verbose = 2
+        self.run_tests(2)
+        name = ' ' + str(self)
+        self.assertEqual(self.stdout.flushed, [
+            name,
+            name + '\n' + name,
+            name + '\n' + name + '\n',
+        ])
+
+    def test_flushes_after_failures(self):
+        self.options.verbose = 1
+        try:
+            self.fail('boom')
+        except self.failureException:
+            exc_info = sys.exc_info()
+        with redirect_stdout(self.stdout):
+            self.output.start_test(self, 1, 2)
+            self.output.stop_test(self, 0)
+            self.output.start_test(self, 2, 2)
+            self.output.test_failure(self, 0, exc_info)
+        self.assertEqual(len(self.stdout.flushed), 2)
+        self.assertIn('AssertionError: boom', self.stdout.flushed[-1])
+
+    def test_heartbeat_in_subprocess(self):
+        self.options.resume_layer = 'layer'
+        self.options.processes = 2
+        self.run_tests(5)
+        # The dots of the tests run since the last heartbeat are written
+        # as a single line.
+        self.assertEqual(self.stdout.getvalue(), '.\n....\n')
+
+
+class TestProgressRate(unittest.TestCase):
+
+    def setUp(self):
+        self.options = FormatterOptions()
+        self.options.progress = True
+        self.options.progress_rate = 10
+        self.output = formatter.OutputFormatter(self.options)
+        self.stdout = io.StringIO()
+
+    def run_tests(self, n, gccount=0):
+        with redirect_stdout(self.stdout):
+            for i in range(n):
+                self.output.start_test(self, i + 1, n)
+                self.output.test_success(self, 0)
+                self.output.stop_test(self, gccount)
+            self.output.stop_tests()
+        return self.stdout.getvalue()
+
+    def test_skips_status_of_fast_tests(self):
+        self.options.verbose = 1
+        output = self.run_tests(5)
+        self.assertEqual(output.count('/5 ('), 2)
+        self.assertNotIn('!', output)
+
+    def test_garbage_collected_is_reported(self):
+        # --gc-after-test reports the garbage collected after every test,
+        # also if its status would not be written otherwise.
+        self.options.verbose = 1
+        output = self.run_tests(5, gccount=3)
+        self.assertEqual(output.count('!'), 5)
+        self.assertEqual(output.count('/5 ('), 5)
+
+    def test_garbage_count_is_reported(self):
+        self.options.verbose = 2
+        output = self.run_tests(5, gccount=3)
+        self.assertEqual(output.count(' [3]'), 5)
+
+
+class TestDeduplicateTracebacks(unittest.TestCase):
+
+    def setUp(self):
+        self.options = FormatterOptions()
+        self.options.deduplicate_tracebacks = True
+        self.output = formatter.OutputFormatter(self.options)
+        self.stdout = io.StringIO()
+
+    def fail_test(self, message='broken fixture'):
+        try:
+            self.fail(message)
+        except self.failureException:
+            exc_info = sys.exc_info()
+        with redirect_stdout(self.stdout):
+            self.output.test_failure(self, 0, exc_info)
+        output = self.stdout.getvalue()
+        self.stdout.seek(0)
+        self.stdout.truncate()
+        return output
+
+    def test_same_traceback_is_printed_once(self):
+        self.assertIn('AssertionError: broken fixture', self.fail_test())
+        self.assertEqual(self.fail_test(), '\n\nFailure in test %s\n'
+                         'Same traceback as in test %s (2 times)\n\n'
+                         % (self, self))
+        self.assertIn('(3 times)', self.fail_test())
+        self.assertIn('AssertionError: other', self.fail_test('other'))
+
+    def test_without_option(self):
+        self.options.deduplicate_tracebacks = False
+        self.fail_test()
+        self.assertIn('AssertionError: broken fixture', self.fail_test())
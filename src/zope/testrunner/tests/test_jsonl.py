@@ -0,0 +1,52 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Unit tests for the JSON lines event stream
+"""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from zope.testrunner.jsonl import JSONLinesOutputFormattingWrapper
+
+
+class Delegate:
+
+    def info(self, message):
+        pass
+
+
+class TestJSONLinesOutputFormattingWrapper(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.path = os.path.join(tmpdir, 'events.jsonl')
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o666)
+        self.output = JSONLinesOutputFormattingWrapper(Delegate(), fd)
+        self.addCleanup(self.output.close)
+
+    def events(self):
+        with open(self.path) as f:
+            return [json.loads(line)['event'] for line in f]
+
+    def test_no_events_after_close(self):
+        self.output.info('before')
+        self.output.close()
+        # The event is dropped, instead of being written to whatever file
+        # got the file descriptor in the meantime.
+        self.output.info('after')
+        self.output.close()
+        self.assertEqual(self.events(), ['info'])
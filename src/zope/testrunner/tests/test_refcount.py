@@ -0,0 +1,88 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Unit tests for zope.testrunner.refcount."""
+
+import gc
+import sys
+import unittest
+from unittest import mock
+
+from zope.testrunner import refcount
+
+
+class Tracked:
+    pass
+
+
+TRACKED = 'zope.testrunner.tests.test_refcount.Tracked'
+
+
+class TestCountTypes(unittest.TestCase):
+
+    def test_all_types(self):
+        counts = refcount.count_types([1, 2, 'a', Tracked()])
+        self.assertEqual(counts, {int: 2, str: 1, Tracked: 1})
+
+    def test_packages(self):
+        objects = [1, 'a', Tracked(), Tracked(), mock.Mock()]
+        counts = refcount.count_types(objects, [__name__])
+        self.assertEqual(counts, {Tracked: 2})
+        counts = refcount.count_types(objects, ['zope.testrunner'])
+        self.assertEqual(counts, {Tracked: 2})
+        counts = refcount.count_types(objects, ['zope.test'])
+        self.assertEqual(counts, {})
+
+
+def changes(track):
+    # The test cases are instances of types of this module, too.
+    return [delta for delta in track.delta if any(delta[1:])]
+
+
+class TestTrackRefs(unittest.TestCase):
+
+    def setUp(self):
+        # sys.getobjects only exists in debug builds of Python.
+        patcher = mock.patch.object(
+            sys, 'getobjects', create=True,
+            new=lambda limit: gc.get_objects())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_update(self):
+        track = refcount.TrackRefs([__name__])
+        self.assertEqual(track.delta, None)
+        kept = [Tracked(), Tracked()]
+        track.update()
+        self.assertEqual(changes(track), [(TRACKED, 2, 2)])
+        kept.append(kept[0])
+        track.update()
+        self.assertEqual(changes(track), [(TRACKED, 0, 1)])
+        del kept[:]
+        track.update()
+        self.assertEqual(changes(track), [(TRACKED, -2, -3)])
+
+
+class TestTrackObjects(unittest.TestCase):
+
+    def test_update(self):
+        track = refcount.TrackObjects([__name__])
+        self.assertEqual(track.delta, None)
+        kept = [Tracked(), Tracked()]
+        track.update()
+        self.assertEqual(changes(track), [(TRACKED, 2)])
+        self.assertEqual(track.change, 2)
+        del kept[:]
+        track.update()
+        self.assertEqual(changes(track), [(TRACKED, -2)])
+        self.assertEqual(track.change, -2)
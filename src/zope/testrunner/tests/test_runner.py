@@ -13,11 +13,16 @@
 ##############################################################################
 """Unit tests for the testrunner's runner logic
 """
+import gc
+import io
 import sys
 import unittest
+import weakref
+from contextlib import redirect_stdout
 
 from zope.testrunner import runner
 from zope.testrunner.layer import UnitTests
+from zope.testrunner.options import get_options
 
 
 class TestLayerOrdering(unittest.TestCase):
@@ -258,6 +263,101 @@ class TestLayerOrdering(unittest.TestCase):
         # would put the layers in a different order: K3, K1, K2, ZZ.
         # Does that matter?  The class diagram is symmetric, so I think not.
 
+    def test_layer_graph(self):
+        class A:
+            pass
+
+        class B:
+            pass
+
+        class AB(A, B):
+            pass
+        graph = runner.LayerGraph()
+        self.assertEqual(graph.gather(AB), (AB, A, B))
+        self.assertIs(graph.gather(AB), graph.gather(AB))
+        self.assertEqual(graph.needed(AB), {A, B, AB})
+        self.assertEqual(graph.ordered_bases(AB),
+                         tuple(runner.order_by_bases([A, B, AB])))
+        self.assertEqual(graph.sort_key(AB), runner.layer_sort_key(AB))
+        self.assertEqual(runner.order_by_bases([AB, B, A], graph),
+                         runner.order_by_bases([AB, B, A]))
+
+    def test_layer_graph_is_kept_with_the_options(self):
+        options = get_options(['test'])
+        graph = runner.layer_graph(options)
+        self.assertIsInstance(graph, runner.LayerGraph)
+        self.assertIs(runner.layer_graph(options), graph)
+
+    def set_ups(self, layers):
+        return ', '.join(layer.__name__
+                         for layer in runner.layer_set_ups(layers))
+
+    def order_by_cost(self, *layers, costs=None):
+        costs = costs or {}
+
+        def setup_cost(layer):
+            return costs.get(layer.__name__, 1.0)
+
+        return ', '.join(layer.__name__
+                         for layer in runner.order_by_cost(layers, setup_cost))
+
+    def test_layer_set_ups(self):
+        class A:
+            pass
+
+        class A1(A):
+            pass
+
+        class B:
+            pass
+
+        self.assertEqual(self.set_ups([A1, B, A]), 'A, A1, B, A')
+        self.assertEqual(self.set_ups([A, A1, B]), 'A, A1, B')
+
+    def test_order_by_cost(self):
+        # L1 and L3 share the base E, L1 and L2 share the base A.
+        class E:
+            pass
+
+        class A:
+            pass
+
+        class B:
+            pass
+
+        class L1(E, A):
+            pass
+
+        class L2(A):
+            pass
+
+        class L3(E, B):
+            pass
+        self.assertEqual(self.order(L1, L2, L3), 'L1, L2, L3')
+        self.assertEqual(self.set_ups(runner.order_by_bases([L1, L2, L3])),
+                         'A, E, L1, L2, B, E, L3')
+        # E is expensive, so we keep it set up for L1 and L3.
+        self.assertEqual(
+            self.order_by_cost(L1, L2, L3, costs={'E': 10.0}),
+            'L2, L1, L3')
+        # Even without knowing costs, we avoid setting up E twice.
+        self.assertEqual(self.order_by_cost(L1, L2, L3), 'L2, L1, L3')
+
+    def test_order_by_cost_keeps_default_order(self):
+        class A:
+            pass
+
+        class A1(A):
+            pass
+
+        class A2(A):
+            pass
+
+        class B:
+            pass
+        self.assertEqual(self.order_by_cost(B, A2, A1, UnitTests),
+                         self.order(B, A2, A1, UnitTests))
+
     def test_FakeInputContinueGenerator_close(self):
         # multiprocessing (and likely other forkful frameworks) want to
         # close sys.stdin.  The test runner replaces sys.stdin with a
@@ -268,6 +368,152 @@ class TestLayerOrdering(unittest.TestCase):
         f.close()
 
 
+class TestReleaseTests(unittest.TestCase):
+    """Test dropping tests once they have run."""
+
+    class Sample(unittest.TestCase):
+        def test_pass(self):
+            pass
+
+        def test_fail(self):
+            self.fail('failed')
+
+    def run_sample(self, *args):
+        options = get_options(['test'] + list(args))
+        options.resume_layer = None
+        tests = unittest.TestSuite(
+            [self.Sample('test_pass'), self.Sample('test_fail')])
+        refs = [weakref.ref(test) for test in tests]
+        failures = []
+        with redirect_stdout(io.StringIO()):
+            ran = runner.run_tests(
+                options, tests, 'zope.testrunner.layer.UnitTests',
+                failures, [], [], [])
+        self.assertEqual(ran, 2)
+        gc.collect()
+        return tests, refs, failures
+
+    def test_tests_are_kept_by_default(self):
+        tests, refs, failures = self.run_sample()
+        self.assertEqual([ref() is None for ref in refs], [False, False])
+        self.assertIs(failures[0][0], refs[1]())
+
+    def test_tests_are_released(self):
+        tests, refs, failures = self.run_sample('--release-tests')
+        self.assertEqual([ref() is None for ref in refs], [True, True])
+        self.assertEqual(len(failures), 1)
+        test, text = failures[0]
+        self.assertEqual(test, str(self.Sample('test_fail')))
+        self.assertIn('AssertionError: failed', text)
+        # The suite still knows how many tests it had.
+        self.assertEqual(tests.countTestCases(), 2)
+
+    def test_tests_are_released_in_last_repetition(self):
+        tests, refs, failures = self.run_sample('--release-tests', '-N', '2')
+        self.assertEqual([ref() is None for ref in refs], [True, True])
+        self.assertIsNot(failures[0][0], failures[1][0])
+        self.assertEqual(failures[0][0], str(failures[1][0]))
+
+
+class HookedLayer:
+    """Layer recording its per-test hooks."""
+
+    calls = []
+
+    @classmethod
+    def testSetUp(cls):
+        cls.calls.append('set up base')
+
+    @classmethod
+    def testTearDown(cls):
+        cls.calls.append('tear down base')
+
+
+class HookedSubLayer(HookedLayer):
+
+    @classmethod
+    def testSetUp(cls):
+        cls.calls.append('set up sub')
+
+
+class TestTestResult(unittest.TestCase):
+    """Test the per-test work of the result."""
+
+    class Sample(unittest.TestCase):
+        def test_change_state(self):
+            self.changed = True
+
+    def make_result(self, *args):
+        options = get_options(['test'] + list(args))
+        options.resume_layer = None
+        return runner.TestResult(
+            options, [], 'zope.testrunner.tests.test_runner.HookedSubLayer')
+
+    def test_layer_hooks(self):
+        result = self.make_result()
+        del HookedLayer.calls[:]
+        result.testSetUp()
+        result.testTearDown()
+        # Inherited hooks are called once for every layer which has them.
+        self.assertEqual(
+            HookedLayer.calls,
+            ['set up base', 'set up sub', 'tear down base',
+             'tear down base'])
+
+    def test_layer_hooks_bound_once(self):
+        # The hooks are looked up when the result is created, not for
+        # every test (see benchmarks/runner_overhead.py).
+        result = self.make_result()
+        self.assertEqual(
+            result._test_set_ups,
+            [HookedLayer.testSetUp, HookedSubLayer.testSetUp])
+        self.assertEqual(
+            result._test_tear_downs,
+            [HookedSubLayer.testTearDown, HookedLayer.testTearDown])
+
+    def test_state_restored(self):
+        result = self.make_result()
+        test = self.Sample('test_change_state')
+        state = test.__dict__.copy()
+        with redirect_stdout(io.StringIO()):
+            test(result)
+        self.assertFalse(hasattr(test, 'changed'))
+        self.assertEqual(test.__dict__, state)
+
+    def test_ignore_new_threads(self):
+        result = self.make_result('--ignore-new-thread', 'ignored-.*')
+        self.assertTrue(result._ignore_new_threads[0].match('ignored-1'))
+        self.assertFalse(result._ignore_new_threads[0].match('other'))
+
+
+class TestConcurrentSetUp(unittest.TestCase):
+    """Test setting up layers in threads."""
+
+    def test_failure(self):
+        class P:
+            threadSafeSetUp = True
+
+            @classmethod
+            def setUp(cls):
+                raise ValueError('P')
+
+        class Q:
+            threadSafeSetUp = True
+
+        class PQ(P, Q):
+            pass
+
+        options = get_options(['test', '--concurrent-setup'])
+        setup_layers = {}
+        with redirect_stdout(io.StringIO()) as stdout:
+            with self.assertRaisesRegex(ValueError, 'P'):
+                runner.setup_layer(options, PQ, setup_layers)
+        # The independent set up of Q was not affected.
+        self.assertEqual(setup_layers, {Q: 1})
+        self.assertIn('Set up %s' % runner.name_from_layer(P),
+                      stdout.getvalue())
+
+
 @unittest.skipIf(sys.warnoptions, "Only done if no user override")
 class TestWarnings(unittest.TestCase):
 
@@ -312,6 +558,34 @@ class TestWarnings(unittest.TestCase):
         self.assertIn(msg, handler.records[0].getMessage())
 
 
+class TestDescribeCycles(unittest.TestCase):
+
+    def make_cycles(self, n_cycles, n_objects):
+        cycles = []
+        for i in range(n_cycles):
+            objects = [[] for j in range(n_objects)]
+            for j, obj in enumerate(objects):
+                obj.append(objects[j - 1])
+            cycles.extend(objects)
+        return cycles
+
+    def test_describe_cycles(self):
+        objects = self.make_cycles(2, 3) + [{}]
+        cycles = runner.describe_cycles(objects)
+        self.assertEqual(len(cycles), 2)
+        for cycle in cycles:
+            self.assertEqual(len(cycle), 3)
+            self.assertTrue(cycle[0][0].startswith('[[['))
+
+    def test_large_cycles_are_summarized(self):
+        objects = self.make_cycles(3, 20)
+        cycles = runner.describe_cycles(objects, max_cycles=2, max_objects=5)
+        self.assertEqual(len(cycles), 3)
+        self.assertEqual(len(cycles[0]), 6)
+        self.assertEqual(cycles[0][-1], ['and 15 more objects: 15 list'])
+        self.assertEqual(cycles[2], 'and 1 more cycles of 20 objects: 20 list')
+
+
 class TestReprLines(unittest.TestCase):
     def test_unprintable(self):
 
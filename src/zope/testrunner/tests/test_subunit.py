@@ -17,6 +17,8 @@
 import io
 import sys
 import unittest
+from datetime import datetime
+from datetime import timezone
 
 from zope.testrunner import formatter
 
@@ -74,5 +76,54 @@ else:
             self.subunit_formatter = formatter.SubunitV2OutputFormatter(
                 options, stream=self.output)
 
+    class TestStreamResultToBytes(unittest.TestCase):
+        """The native encoder writes the same bytes as subunit's."""
+
+        def assertSameBytes(self, **kw):
+            expected = io.BytesIO()
+            subunit.StreamResultToBytes(expected).status(**kw)
+            output = io.BytesIO()
+            formatter._StreamResultToBytes(output).status(**kw)
+            self.assertEqual(output.getvalue(), expected.getvalue())
+
+        def test_status(self):
+            timestamp = datetime(2026, 10, 19, 12, 30, 15, 123456,
+                                 tzinfo=timezone.utc)
+            self.assertSameBytes()
+            self.assertSameBytes(test_id='test', test_status='inprogress',
+                                 timestamp=timestamp)
+            self.assertSameBytes(test_id='t\u00e9st', test_status='fail',
+                                 test_tags={'zope:layer:foo'},
+                                 route_code='0')
+            self.assertSameBytes(test_id='test', test_status='exists',
+                                 timestamp=datetime(1970, 1, 1,
+                                                    tzinfo=timezone.utc))
+
+        def test_files(self):
+            for size in 0, 10, 100, 20000:
+                self.assertSameBytes(
+                    test_id='test', file_name='traceback',
+                    file_bytes=b'x' * size, eof=True,
+                    mime_type='text/plain; charset=utf8')
+
+        def test_numbers(self):
+            for value in 0, 63, 64, 16383, 16384, 4194303, 4194304:
+                self.assertEqual(
+                    formatter._encode_number(value),
+                    b''.join(subunit.StreamResultToBytes(io.BytesIO())
+                             ._encode_number(value)))
+            with self.assertRaises(ValueError):
+                formatter._encode_number(2 ** 30)
+
+        def test_not_runnable(self):
+            output = io.BytesIO()
+            result = formatter._StreamResultToBytes(output)
+            with result.setRunnable(False):
+                result.status(test_id='test')
+            expected = io.BytesIO()
+            subunit.StreamResultToBytes(expected).status(
+                test_id='test', runnable=False)
+            self.assertEqual(output.getvalue(), expected.getvalue())
+
     def test_suite():
         return unittest.defaultTestLoader.loadTestsFromName(__name__)
@@ -0,0 +1,87 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Unit tests for the traceback formatting
+"""
+import sys
+import unittest
+from unittest import mock
+
+from zope.testrunner import tb_format
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def fail_with_info(message):
+    __traceback_info__ = message
+    raise ValueError(message)
+
+
+def exc_info(function, message='broken fixture'):
+    try:
+        function(message)
+    except ValueError:
+        return sys.exc_info()
+
+
+class TestFormatException(unittest.TestCase):
+
+    def setUp(self):
+        tb_format._formatted.clear()
+        self.addCleanup(tb_format._formatted.clear)
+        patcher = mock.patch.object(
+            tb_format, '_format_exception',
+            wraps=tb_format._format_exception)
+        self.format = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_same_tracebacks_are_formatted_once(self):
+        first = tb_format.format_exception(*exc_info(fail))
+        second = tb_format.format_exception(*exc_info(fail))
+        self.assertEqual(first, second)
+        self.assertEqual(first[-1], 'ValueError: broken fixture\n')
+        self.assertEqual(self.format.call_count, 1)
+
+    def test_different_messages_are_formatted_again(self):
+        tb_format.format_exception(*exc_info(fail))
+        last = tb_format.format_exception(*exc_info(fail, 'other'))
+        self.assertEqual(last[-1], 'ValueError: other\n')
+        self.assertEqual(self.format.call_count, 2)
+
+    def test_traceback_info_is_formatted_again(self):
+        tb_format.format_exception(*exc_info(fail_with_info, 'one'))
+        tb_format.format_exception(*exc_info(fail_with_info, 'one'))
+        self.assertEqual(self.format.call_count, 2)
+
+    def test_traceback_key(self):
+        key = tb_format.traceback_key(*exc_info(fail))
+        self.assertEqual(key, tb_format.traceback_key(*exc_info(fail)))
+        self.assertNotEqual(
+            key, tb_format.traceback_key(*exc_info(fail, 'other')))
+        self.assertIsNone(
+            tb_format.traceback_key(*exc_info(fail_with_info)))
+
+    def test_format_tb(self):
+        tb = exc_info(fail)[2]
+        with mock.patch('traceback.format_tb',
+                        wraps=tb_format.traceback.format_tb) as format_tb:
+            first = tb_format.format_tb(tb)
+            # __traceback_info__ is not part of the plain stack trace, so
+            # it does not prevent the caching.
+            tb_format.format_tb(exc_info(fail_with_info)[2])
+            second = tb_format.format_tb(exc_info(fail, 'other')[2])
+        self.assertEqual(first, second)
+        self.assertIn('in fail\n', first)
+        self.assertEqual(format_tb.call_count, 2)
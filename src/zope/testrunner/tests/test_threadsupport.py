@@ -11,13 +11,15 @@
 # FOR A PARTICULAR PURPOSE.
 #
 ##############################################################################
-from _thread import start_new_thread
+import _thread
 from threading import Lock
 from threading import Thread
 from time import sleep
 from unittest import TestCase
 from unittest import skipUnless
 
+from ..threadsupport import count_started_threads
+from ..threadsupport import counts
 from ..threadsupport import current_frames
 from ..threadsupport import enumerate
 
@@ -45,7 +47,8 @@ class ThrThread(ThreadMixin, Thread):
 
 class DummyThread(ThreadMixin):
     def start(self):
-        start_new_thread(self.run, ())
+        # Looked up when called, so that started threads are counted.
+        _thread.start_new_thread(self.run, ())
 
 
 class Tests(TestCase):
@@ -122,3 +125,35 @@ class Tests(TestCase):
         t.lock.release()
         sleep(0.01)
         self.assertEqual(self.alive(), [])
+
+    def test_thr_counts(self):
+        self.check_counts("Test ThrThread")
+
+    def test_dummy_counts(self):
+        self.check_counts()
+
+    def check_counts(self, name=None):
+        before = counts()
+        t = self._mk_thread(name)
+        self.assertNotEqual(counts(), before)
+        running = counts()[1:]
+        t.lock.release()
+        sleep(0.01)
+        self.assertNotEqual(counts()[1:], running)
+
+    def test_thr_counts_started(self):
+        self.check_counts_started("Test ThrThread")
+
+    def test_dummy_counts_started(self):
+        self.check_counts_started()
+
+    def check_counts_started(self, name=None):
+        count_started_threads()
+        t = self._mk_thread(name and (name + "-1"))
+        before = counts()
+        # One thread stops while another one is started.
+        t.lock.release()
+        sleep(0.01)
+        self._mk_thread(name and (name + "-2"))
+        self.assertEqual(counts()[1:], before[1:])
+        self.assertNotEqual(counts(), before)
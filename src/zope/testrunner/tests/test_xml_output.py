@@ -14,11 +14,16 @@
 """Unit tests for the XML reports
 """
 import contextlib
+import doctest
 import io
+import os
+import re
 import shutil
 import sys
+import tarfile
 import tempfile
 import unittest
+import zlib
 from pathlib import Path
 
 from zope import testrunner
@@ -97,6 +102,24 @@ class TestXMLOutput(Base):
             '<testcase classname="sample3.sampletests.TestA" name="test_z0"',
             content)
 
+    def test_xml_report_archive(self):
+        # With --compress-reports, the reports are written to a compressed
+        # archive of the testreports directory instead.
+        self._run_tests()
+        reports = sorted(x.name for x in self.reports_folder.iterdir())
+        shutil.rmtree(self.reports_folder)
+        self.default_argv.extend(['--compress-reports', 'gzip'])
+        self._run_tests()
+        self.assertEqual([x.name for x in self.tmpdir.iterdir()],
+                         ['testreports.tar.gz'])
+        with tarfile.open(self.tmpdir / 'testreports.tar.gz') as tar:
+            members = tar.getmembers()
+            content = tar.extractfile(members[0]).read().decode('utf-8')
+        self.assertEqual(
+            sorted(member.name for member in members),
+            ['testreports/' + name for name in reports])
+        self.assertIn('<testcase classname=', content)
+
 
 class TextXMLOutputWithErrors(Base):
     """If errors/failures happen, they are also reported in the XML files
@@ -166,3 +189,238 @@ class TextXMLOutputWithErrors(Base):
         # The failure is reported:
         self.assertIn("class 'AssertionError'", content)
         self.assertIn("self.assertEqual(1, 0)", content)
+
+
+class TestXMLOutputSubprocess(TestXMLOutput):
+    """Tests run in subprocesses are reported by the parent process."""
+
+    def setUp(self):
+        super().setUp()
+        self.arg_defaults[-1] = 'sampletests_ntd$'
+        self.default_argv = [
+            sys.argv[0], '-s', 'sample1', '-s', 'sample2', '-s', 'sample3',
+            f'--xml={self.tmpdir}']
+
+    def _run_tests(self):
+        # The output of subprocesses is copied to the buffer of stdout.
+        stream1 = io.TextIOWrapper(io.BytesIO())
+        stream2 = io.StringIO()
+        with contextlib.redirect_stdout(stream1):
+            with contextlib.redirect_stderr(stream2):
+                testrunner.run_internal(self.arg_defaults, self.default_argv)
+
+    def test_xml_report(self):
+        self._run_tests()
+        reports = sorted(x.name for x in self.reports_folder.iterdir())
+        self.assertEqual(reports, [
+            'sample1.sampletests_ntd.TestSomething.xml',
+            'sample2.sampletests_ntd.TestSomething.xml',
+            'sample3.sampletests_ntd.TestSomething.xml',
+        ])
+
+    def test_xml_report_details(self):
+        self._run_tests()
+        # sample2 and sample3 were run in subprocesses:
+        report = (self.reports_folder /
+                  'sample3.sampletests_ntd.TestSomething.xml')
+        content = report.read_text()
+        self.assertIn(' tests="6" ', content)
+        self.assertIn(' errors="2" ', content)
+        self.assertIn(' failures="2" ', content)
+        self.assertIn('<error message="Can we see errors"', content)
+        self.assertIn('in test_error1', content)
+
+    def test_suite_in_several_processes(self):
+        # With several processes, every layer is run in a subprocess.  The
+        # reports of suites with tests in several layers have all of them.
+        self.arg_defaults[-1] = '^sampletests$'
+        self.default_argv = [sys.argv[0], '-j2', '-t', 'sampletestsl',
+                             f'--xml={self.tmpdir}']
+        self._run_tests()
+        report, = self.reports_folder.glob('*sampletestsl.rst.xml')
+        content = report.read_text()
+        self.assertIn(' tests="12" ', content)
+        self.assertEqual(content.count('<testcase '), 12)
+
+
+class Delegate:
+
+    def test_success(self, test, seconds):
+        pass
+
+    def test_failure(self, test, seconds, exc_info):
+        pass
+
+    def stop_test(self, test, gccount):
+        pass
+
+
+class SampleTest(unittest.TestCase):
+
+    def test_one(self):
+        pass
+
+    def test_two(self):
+        pass
+
+
+class TestXMLOutputFormattingWrapper(Base):
+    """The report of a test suite is written as soon as its tests were run.
+    """
+
+    def setUp(self):
+        from zope.testrunner.formatter import XMLOutputFormattingWrapper
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.output = XMLOutputFormattingWrapper(Delegate(), self.tmpdir)
+        self.report = (self.tmpdir / 'testreports' /
+                       f'{__name__}.SampleTest.xml')
+
+    def test_written_when_suite_complete(self):
+        one, two = SampleTest('test_one'), SampleTest('test_two')
+        self.output.expect_tests([one, two])
+        self.output.test_success(one, 0.5)
+        self.output.stop_test(one, 0)
+        self.assertFalse(self.report.exists())
+
+        try:
+            self.fail('boom')
+        except AssertionError:
+            self.output.test_failure(two, 0.25, sys.exc_info())
+        self.output.stop_test(two, 0)
+        content = self.report.read_text()
+        self.assertIn(' tests="2" ', content)
+        self.assertIn(' failures="1" ', content)
+        self.assertIn(' time="0.75" ', content)
+        self.assertIn('<failure message="boom"', content)
+        self.assertIn('in test_written_when_suite_complete', content)
+        # Only the formatted traceback was kept:
+        self.assertEqual(self.output._testSuites, {})
+
+        # Nothing is left to be written at the end:
+        self.report.unlink()
+        self.output.writeXMLReports()
+        self.assertFalse(self.report.exists())
+
+    def test_incomplete_suites_written_at_the_end(self):
+        one, two = SampleTest('test_one'), SampleTest('test_two')
+        self.output.expect_tests([one, two], repeat=2)
+        for test in one, two:
+            self.output.test_success(test, 0)
+            self.output.stop_test(test, 0)
+        self.assertFalse(self.report.exists())
+        self.output.writeXMLReports()
+        self.assertIn(' tests="2" ', self.report.read_text())
+
+    def _run_late_tests(self, output, expected):
+        one, two = SampleTest('test_one'), SampleTest('test_two')
+        output.expect_tests(expected(one, two))
+        output.test_success(one, 0.5)
+        output.stop_test(one, 0)
+        try:
+            self.fail('late')
+        except AssertionError:
+            output.test_failure(two, 0.25, sys.exc_info())
+        output.stop_test(two, 0)
+        output.writeXMLReports()
+
+    def test_late_tests_added_to_written_report(self):
+        self._run_late_tests(self.output, lambda one, two: [one])
+        content = self.report.read_text()
+        self.assertIn(' tests="2" ', content)
+        self.assertIn(' failures="1" ', content)
+        self.assertIn(' time="0.75" ', content)
+        self.assertIn('<failure message="late"', content)
+        self.assertEqual(
+            [x.name for x in self.report.parent.iterdir()],
+            [self.report.name])
+
+        # The report is the same as if all tests were expected:
+        from zope.testrunner.formatter import XMLOutputFormattingWrapper
+        tmpdir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self._run_late_tests(
+            XMLOutputFormattingWrapper(Delegate(), tmpdir), lambda *t: t)
+        report = tmpdir / 'testreports' / self.report.name
+
+        def without_timestamp(text):
+            return re.sub(' timestamp="[^"]*"', '', text)
+        self.assertEqual(without_timestamp(content),
+                         without_timestamp(report.read_text()))
+
+    def test_archive_readable_before_it_is_complete(self):
+        # If the test run is killed, the archive can be read up to the
+        # last report flushed.
+        self.output.compress = 'gzip'
+        one = SampleTest('test_one')
+        self.output.expect_tests([one])
+        self.output.test_success(one, 0)
+        self.output.stop_test(one, 0)
+        partial = self.tmpdir / 'testreports.tar.gz.part'
+        data = zlib.decompressobj(31).decompress(partial.read_bytes())
+        with tarfile.open(fileobj=io.BytesIO(data)) as tar:
+            members = {member.name: tar.extractfile(member).read()
+                       for member in tar.getmembers()}
+        self.assertEqual(
+            list(members), [f'testreports/{__name__}.SampleTest.xml'])
+        self.assertIn(b'name="test_one"', *members.values())
+        self.output.writeXMLReports()
+        self.assertFalse(partial.exists())
+
+    def test_late_tests_archived_in_another_report(self):
+        self.output.compress = 'gzip'
+        one, two = SampleTest('test_one'), SampleTest('test_two')
+        self.output.expect_tests([one])
+        self.output.test_success(one, 0)
+        self.output.stop_test(one, 0)
+        self.output.test_success(two, 0)
+        self.output.stop_test(two, 0)
+        self.output.writeXMLReports()
+        with tarfile.open(self.tmpdir / 'testreports.tar.gz') as tar:
+            members = {member.name: tar.extractfile(member).read()
+                       for member in tar.getmembers()}
+        name = f'testreports/{__name__}.SampleTest'
+        self.assertEqual(sorted(members),
+                         [f'{name}-late.xml', f'{name}.xml'])
+        self.assertIn(b'name="test_one"', members[f'{name}.xml'])
+        self.assertIn(b'name="test_two"', members[f'{name}-late.xml'])
+
+
+class TestParseTest(unittest.TestCase):
+    """Names of tests in the XML reports"""
+
+    def setUp(self):
+        self.cwd = os.getcwd()
+        self.tmpdir = Path(tempfile.mkdtemp())
+        (self.tmpdir / 'pkg' / 'sub').mkdir(parents=True)
+        os.chdir(self.tmpdir / 'pkg')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        shutil.rmtree(self.tmpdir)
+
+    def _doctest(self, name, filename):
+        return doctest.DocTest([], {}, name, filename, 0, '')
+
+    def test_parse_test(self):
+        from zope.testrunner.formatter import parse_test
+        self.assertEqual(
+            parse_test(SampleTest('test_one')),
+            (f'{__name__}.SampleTest', 'test_one', f'{__name__}.SampleTest'))
+        docfile = doctest.DocFileCase(self._doctest(
+            'file.rst', str(self.tmpdir / 'pkg' / 'file.rst')))
+        self.assertEqual(parse_test(docfile),
+                         ('doctest-pkg-file.rst', 'file.rst', 'pkg'))
+        doc = doctest.DocTestCase(self._doctest('pkg.mod.func', 'mod.py'))
+        # The parser is looked up by the class of the test:
+        for test in doc, doc:
+            self.assertEqual(parse_test(test),
+                             ('pkg.mod', 'func', 'pkg.mod'))
+
+    def test_filename_relative_to_working_directory(self):
+        from zope.testrunner.formatter import filename_to_suite_name_parts
+        filename = str(self.tmpdir / 'pkg' / 'sub' / 'file.rst')
+        self.assertEqual(filename_to_suite_name_parts(filename),
+                         ('pkg', 'sub', 'file.rst'))
+        os.chdir(self.tmpdir / 'pkg' / 'sub')
+        self.assertEqual(filename_to_suite_name_parts(filename),
+                         ('sub', 'file.rst'))
@@ -0,0 +1,28 @@
+from unittest import TestCase
+
+
+kept = []
+
+
+class GcSampleTests(TestCase):
+    # The cycle survives the collection after the first test, so it is
+    # no longer in the youngest generation when it becomes garbage.
+
+    def test_1_keep_cycle(self):
+        kept.append(_Cycle())
+
+    def test_2_drop_cycle(self):
+        del kept[:]
+
+    def test_3_okay(self):
+        pass
+
+    def test_4_okay(self):
+        pass
+
+
+class _Cycle:
+    """Auxiliary class creating a reference cycle."""
+
+    def __init__(self):
+        self.self = self  # create reference cycle
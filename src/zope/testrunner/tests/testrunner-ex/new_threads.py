@@ -12,3 +12,11 @@ class Mythread(threading.Thread):
 class TestNewThreadsReporting(unittest.TestCase):
     def test_leave_thread_behind(self):
         Mythread(name='t1', target=time.sleep, args=[1]).start()
+
+    def test_replace_thread(self):
+        # t1 stops while this test leaves t2 behind, so the number of
+        # running threads does not change.
+        for thread in threading.enumerate():
+            if thread.name == 't1':
+                thread.join()
+        Mythread(name='t2', target=time.sleep, args=[1]).start()
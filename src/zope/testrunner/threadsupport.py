@@ -18,12 +18,23 @@ started with ``_thread.start_new_thread``. If it knows them,
 it does not know when they stop.
 If ``sys._current_frames`` is available, use this to
 reliable determine the currently running threads.
+
+This is relatively expensive, ``counts`` tells cheaply whether it is
+worth doing.
 """
+import _thread
+import functools
 import sys
 import threading
 
 
 current_frames = getattr(sys, "_current_frames", None)
+# The number of threads started with ``_thread.start_new_thread``
+# (including those of ``threading``) which are still running.
+_count = getattr(_thread, "_count", None)
+# The number of threads started since ``count_started_threads`` was called
+_started = 0
+_started_lock = threading.Lock()
 
 if current_frames is None:  # pragma: no cover
     enumerate = threading.enumerate
@@ -36,6 +47,57 @@ else:
                 for i in running]
 
 
+def counts():
+    """return the numbers of started and running threads.
+
+    Threads were started or stopped if the result changed.  The number of
+    started threads only grows, so a thread started while another one
+    stopped is noticed, too, if ``count_started_threads`` was called
+    before.
+    """
+    return (_started, threading.active_count(),
+            _count() if _count is not None else 0)
+
+
+def _counting(start):
+    """wrap *start* to count the threads started."""
+    @functools.wraps(start)
+    def wrapper(*args, **kw):
+        global _started
+        with _started_lock:
+            _started += 1
+        return start(*args, **kw)
+    wrapper.counting = True
+    return wrapper
+
+
+def count_started_threads():
+    """count the threads started from now on (see ``counts``).
+
+    This wraps ``threading.Thread.start`` and
+    ``_thread.start_new_thread``.  Threads started with references to
+    ``_thread.start_new_thread`` looked up before are only noticed if the
+    number of running threads changed.
+    """
+    if not getattr(threading.Thread.start, "counting", False):
+        threading.Thread.start = _counting(threading.Thread.start)
+    if not getattr(_thread.start_new_thread, "counting", False):
+        _thread.start_new_thread = _counting(_thread.start_new_thread)
+
+
+def identity(thread):
+    """return what tells *thread* from other threads.
+
+    The ident of a thread which stopped may be reused by a thread started
+    later, so threads known to ``threading`` are told apart by their
+    ``Thread`` object.
+    """
+    thread = getattr(thread, "thread", thread)
+    if isinstance(thread, DummyThread):
+        return thread.ident
+    return thread
+
+
 class ThreadProxy:
     """auxiliary class to provide ident based ``__eq__``."""
 
@@ -0,0 +1,221 @@
+##############################################################################
+#
+# Copyright (c) 2026 Zope Foundation and Contributors.
+# All Rights Reserved.
+#
+# This software is subject to the provisions of the Zope Public License,
+# Version 2.1 (ZPL).  A copy of the ZPL should accompany this distribution.
+# THIS SOFTWARE IS PROVIDED "AS IS" AND ANY AND ALL EXPRESS OR IMPLIED
+# WARRANTIES ARE DISCLAIMED, INCLUDING, BUT NOT LIMITED TO, THE IMPLIED
+# WARRANTIES OF TITLE, MERCHANTABILITY, AGAINST INFRINGEMENT, AND FITNESS
+# FOR A PARTICULAR PURPOSE.
+#
+##############################################################################
+"""Recording of test and layer timings across test runs.
+"""
+
+import json
+import os
+import sys
+
+import zope.testrunner.feature
+from zope.testrunner.find import name_from_layer
+
+
+class Timings:
+    """Durations of tests and layer set ups, persisted in a JSON file.
+
+    ``tests`` maps test ids and ``layers`` maps layer names to seconds.
+    ``layer_stats`` maps layer names to the statistics of the last run of
+    a layer (see add_layer_stats), ``run_layer_stats`` those of this run.
+    A missing or unreadable file is treated like an empty one.
+    """
+
+    version = 1
+
+    def __init__(self, path=None):
+        self.path = path
+        self.tests = {}
+        self.layers = {}
+        self.layer_stats = {}
+        self.run_layer_stats = {}
+        if path is not None:
+            self.load()
+
+    def load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get('version') != self.version:
+            return
+        self.tests.update(data.get('tests', {}))
+        self.layers.update(data.get('layers', {}))
+        self.layer_stats.update(data.get('layer_stats', {}))
+
+    def add_layer_stats(self, layer_name, set_up=0.0, tear_down=0.0,
+                        tests=0.0, count=0):
+        """Add to the statistics of a layer in this run.
+
+        These are the seconds spent setting up and tearing down the layer,
+        and running its tests, and the number of tests run.
+        """
+        stats = self.run_layer_stats.setdefault(
+            layer_name, dict(set_up=0.0, tear_down=0.0, tests=0.0, count=0))
+        stats['set_up'] += set_up
+        stats['tear_down'] += tear_down
+        stats['tests'] += tests
+        stats['count'] += count
+
+    def run_data(self):
+        """Return what was recorded in this run, for merge()."""
+        return {
+            'tests': self.tests,
+            'layers': self.layers,
+            'layer_stats': self.run_layer_stats,
+        }
+
+    def merge(self, data):
+        """Merge what another process recorded (see run_data)."""
+        self.tests.update(data['tests'])
+        self.layers.update(data['layers'])
+        for layer_name, stats in data['layer_stats'].items():
+            self.add_layer_stats(layer_name, **stats)
+
+    def save(self):
+        layer_stats = dict(self.layer_stats)
+        layer_stats.update(self.run_layer_stats)
+        data = {
+            'version': self.version,
+            'tests': self.tests,
+            'layers': self.layers,
+            'layer_stats': layer_stats,
+        }
+        # Write to a temporary file first, so that an interrupted run
+        # does not leave a truncated file behind.
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(data, f, indent=0, sort_keys=True)
+        os.replace(tmp, self.path)
+
+
+class TimingsOutputFormattingWrapper:
+    """Output formatter which delegates to another formatter for all
+    operations, but also records test and layer set up durations.
+    """
+
+    def __init__(self, delegate, timings):
+        self.delegate = delegate
+        self.timings = timings
+        # The layer being set up or torn down
+        self._layer_name = None
+        # The layer whose tests are being run
+        self.running_layer_name = None
+
+    def __getattr__(self, name):
+        return getattr(self.delegate, name)
+
+    def start_set_up(self, layer_name):
+        self._layer_name = layer_name
+        return self.delegate.start_set_up(layer_name)
+
+    def stop_set_up(self, seconds):
+        self.timings.layers[self._layer_name] = seconds
+        self.timings.add_layer_stats(self._layer_name, set_up=seconds)
+        return self.delegate.stop_set_up(seconds)
+
+    def start_tear_down(self, layer_name):
+        self._layer_name = layer_name
+        return self.delegate.start_tear_down(layer_name)
+
+    def stop_tear_down(self, seconds):
+        self.timings.add_layer_stats(self._layer_name, tear_down=seconds)
+        return self.delegate.stop_tear_down(seconds)
+
+    def summary(self, n_tests, n_failures, n_errors, n_seconds,
+                n_skipped=0):
+        if self.running_layer_name is not None:
+            self.timings.add_layer_stats(
+                self.running_layer_name, tests=n_seconds, count=n_tests)
+        return self.delegate.summary(
+            n_tests, n_failures, n_errors, n_seconds, n_skipped)
+
+    def test_success(self, test, seconds):
+        self.timings.tests[test.id()] = seconds
+        return self.delegate.test_success(test, seconds)
+
+    def test_failure(self, test, seconds, exc_info, **kw):
+        self.timings.tests[test.id()] = seconds
+        return self.delegate.test_failure(test, seconds, exc_info, **kw)
+
+    def test_error(self, test, seconds, exc_info, **kw):
+        self.timings.tests[test.id()] = seconds
+        return self.delegate.test_error(test, seconds, exc_info, **kw)
+
+
+class RecordTimings(zope.testrunner.feature.Feature):
+    """Record the durations of tests and layers.
+
+    Layer subprocesses send what they recorded to the parent process,
+    which writes the file and reports the most expensive layers.
+    """
+
+    def __init__(self, runner):
+        super().__init__(runner)
+        options = runner.options
+        self.active = bool(options.timings or options.report_layers)
+        if self.active:
+            if options.resume_layer is None:
+                self.timings = Timings(options.timings)
+            else:
+                self.timings = Timings()
+            runner.timings = self.timings
+            self.output = options.output = TimingsOutputFormattingWrapper(
+                options.output, self.timings)
+
+    def layer_setup(self, layer):
+        self.output.running_layer_name = name_from_layer(layer)
+
+    def global_teardown(self):
+        if self.runner.options.resume_layer is None and self.timings.path:
+            self.timings.save()
+
+    def report(self):
+        options = self.runner.options
+        if options.resume_layer is not None or not options.report_layers:
+            return
+        output = options.output
+
+        def total(stats):
+            return stats['set_up'] + stats['tear_down'] + stats['tests']
+
+        ranked = sorted(self.timings.run_layer_stats.items(),
+                        key=lambda item: (-total(item[1]), item[0]))
+        output.info("Most expensive layers:")
+        for layer_name, stats in ranked[:options.report_layers]:
+            msg = "  %s: %s (set up %s, tear down %s, %d tests in %s)" % (
+                layer_name,
+                output.format_seconds_short(total(stats)),
+                output.format_seconds_short(stats['set_up']),
+                output.format_seconds_short(stats['tear_down']),
+                stats['count'],
+                output.format_seconds_short(stats['tests']))
+            previous = self.timings.layer_stats.get(layer_name)
+            if previous is not None:
+                msg += ", %+.3f s since the last run" % (
+                    total(stats) - total(previous))
+            output.info(msg)
+
+
+def report_to_parent(timings, stream=sys.stderr):
+    """Send what a layer subprocess recorded to its parent process."""
+    print('timings', json.dumps(timings.run_data(), sort_keys=True),
+          file=stream)
+
+
+def merge_from_subprocess(features, line):
+    """Merge the timings a layer subprocess sent (see report_to_parent)."""
+    for feature in features:
+        if isinstance(feature, RecordTimings) and feature.active:
+            feature.timings.merge(json.loads(line[len(b'timings '):]))